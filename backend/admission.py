@@ -0,0 +1,219 @@
+"""Admission control: bounded concurrency and load shedding per worker.
+
+When the database slows down, handlers hold their threadpool threads and
+connections longer and new requests pile up behind them until every client
+times out. ``AdmissionMiddleware`` caps the work in flight instead and turns
+the excess away quickly, while the client can still retry elsewhere:
+
+* every route (method and path template) may run at most
+  ``ADMISSION_ROUTE_CONCURRENCY`` requests at once, or its entry in
+  ``ADMISSION_ROUTE_LIMITS``; a route at its limit gets ``429``, so one
+  expensive endpoint cannot take every slot;
+* all routes together run at most ``ADMISSION_CONCURRENCY`` requests; beyond
+  that the worker is overloaded and answers ``503``.
+
+A request over a limit waits in that limiter's queue for up to
+``ADMISSION_QUEUE_TIMEOUT`` seconds in total. Queues hold at most
+``ADMISSION_QUEUE_SIZE`` requests and are served by priority class: writes,
+then reads, then bulk reads (export, sync, stats). A full queue sheds its
+lowest-priority waiter to make room for a more urgent request. Health checks,
+metrics and event streams are never queued. Shed requests carry
+``Retry-After``.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from typing import Dict, List, Optional
+
+from starlette.routing import Match
+
+from backend.config import settings
+from backend.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_WAIT, ADMISSION_SHED
+
+# Priority classes, most urgent first
+WRITE, READ, BULK_READ = 0, 1, 2
+PRIORITY_NAMES = {WRITE: "write", READ: "read", BULK_READ: "bulk_read"}
+
+# Never queued: cheap, and must answer while the database struggles. Event
+# streams hold their connection open for as long as the client listens.
+EXEMPT_ROUTES = {"/api/health", "/metrics", "/api/events/"}
+BULK_READ_ROUTES = {"/api/tasks/export", "/api/sync/", "/api/tasks/stats", "/api/tasks/tags"}
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class Shed(Exception):
+    """The request was refused a slot."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Limiter:
+    """At most ``limit`` holders; up to ``queue_size`` waiters, most urgent first.
+
+    Runs on one event loop, so no locking is needed.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        # [priority, sequence, future]; the sequence keeps FIFO order per class
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+
+    def _remove(self, entry: list):
+        self._waiters.remove(entry)
+        heapq.heapify(self._waiters)
+        ADMISSION_QUEUE_DEPTH.dec(limiter=self.name)
+
+    def _shed(self, entry: list, reason: str):
+        self._remove(entry)
+        entry[2].set_exception(Shed(reason))
+
+    async def acquire(self, priority: int, timeout: float):
+        """Take a slot, waiting at most ``timeout`` seconds; raises Shed if none is given."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            ADMISSION_IN_FLIGHT.inc(limiter=self.name)
+            return
+        if timeout <= 0:
+            raise Shed("deadline")
+        if len(self._waiters) >= self.queue_size:
+            worst = max(self._waiters)
+            if worst[0] <= priority:
+                raise Shed("queue_full")
+            self._shed(worst, "preempted")
+
+        loop = asyncio.get_running_loop()
+        entry = [priority, next(self._sequence), loop.create_future()]
+        heapq.heappush(self._waiters, entry)
+        ADMISSION_QUEUE_DEPTH.inc(limiter=self.name)
+        timer = loop.call_later(timeout, lambda: entry[2].done() or self._shed(entry, "deadline"))
+        try:
+            await entry[2]
+        except asyncio.CancelledError:
+            future = entry[2]
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # Handed a slot just as the client went away
+                self.release()
+            elif entry in self._waiters:
+                self._remove(entry)
+            raise
+        finally:
+            timer.cancel()
+
+    def release(self):
+        """Hand the slot to the most urgent waiter, or free it."""
+        while self._waiters:
+            entry = heapq.heappop(self._waiters)
+            ADMISSION_QUEUE_DEPTH.dec(limiter=self.name)
+            if not entry[2].done():
+                entry[2].set_result(None)
+                return
+        self.active -= 1
+        ADMISSION_IN_FLIGHT.dec(limiter=self.name)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+
+def route_template(routes, scope) -> Optional[str]:
+    """Path template of the route that will handle ``scope``, as the router would pick it."""
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+
+def request_priority(method: str, template: str) -> int:
+    if method not in SAFE_METHODS:
+        return WRITE
+    if template in BULK_READ_ROUTES:
+        return BULK_READ
+    return READ
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying the route and global limiters.
+
+    ``routes`` is the application's route list, used to find the route
+    template before the router runs.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+        self._global: Optional[Limiter] = None
+        self._limiters: Dict[str, Limiter] = {}
+
+    def _route_limiter(self, key: str) -> Limiter:
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limit = settings.ADMISSION_ROUTE_LIMITS.get(key, settings.ADMISSION_ROUTE_CONCURRENCY)
+            limiter = self._limiters[key] = Limiter(key, limit, settings.ADMISSION_QUEUE_SIZE)
+        return limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_CONTROL:
+            await self.app(scope, receive, send)
+            return
+        template = route_template(self.routes, scope)
+        if template is None or template in EXEMPT_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        if self._global is None:
+            self._global = Limiter("global", settings.ADMISSION_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE)
+        method = scope["method"]
+        priority = request_priority(method, template)
+        route = self._route_limiter(f"{method} {template}")
+
+        started = time.monotonic()
+        deadline = started + settings.ADMISSION_QUEUE_TIMEOUT
+        held = []
+        try:
+            for limiter in (route, self._global):
+                await limiter.acquire(priority, deadline - time.monotonic())
+                held.append(limiter)
+        except Shed as shed:
+            refused_by = limiter
+            for limiter in held:
+                limiter.release()
+            ADMISSION_SHED.inc(limiter=refused_by.name, priority=PRIORITY_NAMES[priority], reason=shed.reason)
+            # The route's own limit is the client's to back off from; the
+            # worker as a whole being overloaded is not
+            status_code = 429 if refused_by is route else 503
+            await _refuse(send, status_code, shed.reason)
+            return
+        ADMISSION_QUEUE_WAIT.observe(time.monotonic() - started, priority=PRIORITY_NAMES[priority])
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            for limiter in held:
+                limiter.release()
+
+    def stats(self) -> dict:
+        limiters = ([self._global] if self._global else []) + list(self._limiters.values())
+        return {limiter.name: {"active": limiter.active, "queued": limiter.queued} for limiter in limiters}
+
+
+async def _refuse(send, status_code: int, reason: str):
+    body = json.dumps({"detail": "Server is busy, retry later", "reason": reason}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(settings.ADMISSION_RETRY_AFTER).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
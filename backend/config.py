@@ -1,4 +1,5 @@
-from typing import List, Union
+from functools import lru_cache
+from typing import Dict, List, Optional, Union
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
 
@@ -9,11 +10,84 @@ class Settings(BaseSettings):
     # Database
     # This will be automatically picked up from environment variables
     DATABASE_URL: str
+    # Serve requests through SQLAlchemy asyncio (asyncpg / aiosqlite) instead
+    # of the blocking driver. ASYNC_DATABASE_URL defaults to DATABASE_URL with
+    # the driver swapped.
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Connection pool, per worker process. Size it so that
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below max_connections.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = -1  # seconds before a connection is replaced; -1 never
+    DB_POOL_PRE_PING: bool = False  # test connections on checkout (survives failover)
+    # Running behind PgBouncer in transaction mode: no client-side pool and
+    # no cached prepared statements
+    DB_PGBOUNCER: bool = False
+
+    # Read replicas for the read-only endpoints (list or comma-separated
+    # URLs). A client's reads go to the primary for REPLICA_LAG_SECONDS after
+    # its own writes, and replica reads are not cached that long after a
+    # write; a replica that fails is skipped for REPLICA_RETRY_SECONDS.
+    DATABASE_REPLICA_URLS: Union[str, List[str]] = []
+    REPLICA_LAG_SECONDS: float = 5.0
+    REPLICA_RETRY_SECONDS: float = 30.0
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # bcrypt work factor (log2 rounds); existing hashes are upgraded on login
+    BCRYPT_ROUNDS: int = 12
+    # Threads dedicated to password hashing, bounding concurrent bcrypt work
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Response cache for task and category reads. Writes through the API
+    # invalidate it; RESPONSE_CACHE_TTL bounds staleness after writes made
+    # elsewhere. Set RESPONSE_CACHE_URL (redis://...) to share it between
+    # workers; by default each worker keeps its own LRU.
+    RESPONSE_CACHE_URL: Optional[str] = None
+    RESPONSE_CACHE_SIZE: int = 1024
+    RESPONSE_CACHE_TTL: int = 30
+
+    # Change feed (/api/events). "memory" reaches this worker's subscribers
+    # only; "postgres" fans out to every worker through LISTEN/NOTIFY.
+    EVENTS_BROKER: str = "memory"
+    EVENTS_QUEUE_SIZE: int = 100  # events buffered per subscriber before it must resync
+    EVENTS_KEEPALIVE: float = 15.0  # seconds between keepalive comments on idle streams
+
+    # Delta sync (/api/sync) only returns changes at least this many seconds
+    # old, so that a transaction committing late, or a worker with a clock
+    # slightly behind, cannot slip a change in behind an issued watermark
+    SYNC_LAG_SECONDS: float = 2.0
+
+    # Reminder scheduler (backend/reminders.py). Workers run with
+    # python -m backend.reminders; REMINDER_SCHEDULER runs one in each API
+    # process too. Each poll claims up to REMINDER_BATCH_SIZE reminders due
+    # within REMINDER_HORIZON_SECONDS and holds them REMINDER_LEASE_SECONDS
+    # past that horizon before other workers may take them over.
+    REMINDER_SCHEDULER: bool = False
+    REMINDER_BATCH_SIZE: int = 500
+    REMINDER_HORIZON_SECONDS: float = 60.0
+    REMINDER_LEASE_SECONDS: float = 60.0
+    REMINDER_POLL_SECONDS: float = 1.0
+
+    # Admission control (backend/admission.py), per worker process: requests
+    # in flight overall and per route ("METHOD /path/template" overrides in
+    # ADMISSION_ROUTE_LIMITS), waiting at most ADMISSION_QUEUE_TIMEOUT seconds
+    # in queues of ADMISSION_QUEUE_SIZE before a 503/429 with Retry-After
+    ADMISSION_CONTROL: bool = True
+    ADMISSION_CONCURRENCY: int = 64
+    ADMISSION_ROUTE_CONCURRENCY: int = 32
+    ADMISSION_ROUTE_LIMITS: Dict[str, int] = {"GET /api/tasks/export": 4, "POST /api/tasks/import": 2}
+    ADMISSION_QUEUE_SIZE: int = 128
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0
+    ADMISSION_RETRY_AFTER: int = 1
+
+    # Log SQL statements slower than this many milliseconds (off when unset)
+    SLOW_QUERY_MS: Optional[float] = None
     
     # CORS origins can come as a list or comma-separated string from env
     CORS_ORIGINS: Union[str, List[str]] = ["http://localhost:5173"]
@@ -24,15 +98,29 @@ class Settings(BaseSettings):
         case_sensitive = True
         extra = "allow"  # allow extra env vars without error
 
-    @field_validator("CORS_ORIGINS", mode="before")
+    @field_validator("CORS_ORIGINS", "DATABASE_REPLICA_URLS", mode="before")
     @classmethod
-    def parse_cors_origins(cls, v):
+    def parse_string_list(cls, v):
         if isinstance(v, str):
             v = v.strip()
             if v.startswith("[") and v.endswith("]"):
                 import json
                 return json.loads(v)
-            return [origin.strip() for origin in v.split(",")]
+            return [item.strip() for item in v.split(",") if item.strip()]
         return v
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Settings from the environment and .env, read on first use rather than at import."""
+    return Settings()
+
+class _LazySettings:
+    """``settings.NAME`` reads (and writes) ``get_settings().NAME`` when it is evaluated."""
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_settings(), name, value)
+
+settings = _LazySettings()
@@ -1,16 +1,150 @@
+import threading
+from typing import Optional, Union
+
+from fastapi import Depends, Request
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
 
 from backend.config import settings
+from backend.pool import engine_options
+from backend.replicas import Replica, ReplicaSet, wrote_recently
+
+# Async drivers used when DB_ASYNC is enabled and no ASYNC_DATABASE_URL is given
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
 
-engine = create_engine(settings.DATABASE_URL)
+def async_url(url: str) -> str:
+    """Return ``url`` with its driver swapped for the backend's asyncio driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+DBSession = Union[Session, AsyncSession]
+
+class Database:
+    """Engines and session factories of this process, built from Settings.
+
+    Created by the app lifespan at startup, or on first use by scripts and
+    code running outside the app, never at import.
+    """
+
+    def __init__(self):
+        self.engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        if settings.DB_ASYNC:
+            async_database_url = settings.ASYNC_DATABASE_URL or async_url(settings.DATABASE_URL)
+            self.async_engine = create_async_engine(async_database_url, **engine_options(async_database_url, is_async=True))
+            # Objects must stay readable after commit: attribute refreshes cannot
+            # happen implicitly outside the greenlet that runs the query.
+            self.AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+
+        self.replicas = ReplicaSet([
+            Replica(url, async_url(url) if settings.DB_ASYNC else None) for url in settings.DATABASE_REPLICA_URLS
+        ])
+
+    async def dispose(self):
+        self.engine.dispose()
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+        await self.replicas.dispose()
+
+_database: Optional[Database] = None
+_database_lock = threading.Lock()
+
+def get_database() -> Database:
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = Database()
+    return _database
+
+async def close_database():
+    """Dispose of the engines; the next get_database() creates new ones."""
+    global _database
+    database, _database = _database, None
+    if database is not None:
+        await database.dispose()
+
+async def get_db():
+    """Request dependency: an AsyncSession with DB_ASYNC, a Session otherwise.
+
+    Handlers pass their database work through run_db, which accepts either.
+    """
+    database = get_database()
+    if database.AsyncSessionLocal is not None:
+        async with database.AsyncSessionLocal() as db:
+            yield db
+        return
+    db = database.SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        # Closing returns the connection to the pool, with a rollback
+        await run_in_threadpool(db.close)
+
+async def _connect(db: DBSession):
+    if isinstance(db, AsyncSession):
+        await db.connection()
+    else:
+        await run_in_threadpool(db.connection)
+
+async def _close(db: DBSession):
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+async def get_read_db(request: Request, db: DBSession = Depends(get_db)):
+    """Request dependency for handlers that only read: a session on a read replica.
+
+    ``db``, the primary session, is used instead (and only then connects)
+    when no replica is configured or healthy, or when the client wrote within
+    REPLICA_LAG_SECONDS. A replica that cannot be connected to is taken out
+    of rotation and the next one, or the primary, serves the request.
+    """
+    replicas = get_database().replicas
+    replica = replicas.pick() if replicas and not wrote_recently(request) else None
+    while replica is not None:
+        session = replica.session()
+        try:
+            # Connect up front, while the request can still go elsewhere
+            await _connect(session)
+        except (DBAPIError, OSError):
+            await _close(session)
+            if replica.healthy:
+                replica.mark_down()
+            replica = replicas.pick()
+            continue
+        request.state.read_replica = True
+        try:
+            yield session
+        finally:
+            await _close(session)
+        return
+    yield db
+
+async def run_db(db: DBSession, fn, *args, **kwargs):
+    """Run ``fn(session, *args, **kwargs)`` without blocking the event loop.
+
+    ``fn`` is ordinary synchronous ORM code. With an AsyncSession it runs on
+    the event loop through ``run_sync`` and every query awaits the asyncio
+    driver; with a plain Session it runs in the threadpool as FastAPI does for
+    sync handlers.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
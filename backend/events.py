@@ -0,0 +1,240 @@
+"""Change events for tasks and categories, fanned out to live subscribers.
+
+Write handlers publish an event after their transaction commits; every
+subscriber whose filter matches receives it. The broker decides how far the
+event travels:
+
+* ``memory`` (default) delivers to subscribers of this worker process only.
+* ``postgres`` sends every event through ``NOTIFY`` on one channel and each
+  worker ``LISTEN``s on it, so subscribers of every worker see every write.
+
+Publishers never wait for subscribers. Each subscription has a bounded queue;
+a subscriber that falls ``EVENTS_QUEUE_SIZE`` events behind has its backlog
+replaced by a single ``resync`` event, telling the client to refetch instead
+of replaying what it missed.
+"""
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.engine import make_url
+
+from backend.config import settings
+from backend.schemas import Category as CategorySchema, Task as TaskSchema
+
+logger = logging.getLogger(__name__)
+
+RESYNC = {"type": "resync"}
+
+_ANY = object()
+
+
+def task_event(action: str, task, previous: Optional[Dict[str, Any]] = None) -> dict:
+    """Event for a created, updated or deleted task.
+
+    ``previous`` holds the status and category_id before an update, so that
+    subscribers filtering on the old values learn that the task left their view.
+    """
+    data = TaskSchema.model_validate(task).model_dump(mode="json")
+    event = {"type": f"task.{action}", "status": data["status"], "category_id": data["category_id"], "task": data}
+    if previous is not None:
+        event["previous"] = {
+            "status": getattr(previous["status"], "value", previous["status"]),
+            "category_id": previous["category_id"],
+        }
+    return event
+
+
+def category_event(action: str, category) -> dict:
+    data = CategorySchema.model_validate(category).model_dump(mode="json")
+    return {"type": f"category.{action}", "category_id": data["id"], "category": data}
+
+
+class Subscription:
+    """One subscriber's bounded queue of events, filtered by status and category."""
+
+    def __init__(self, status: Optional[str] = None, category_id: Optional[int] = None, maxsize: int = 100):
+        self.status = status
+        self.category_id = category_id
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._loop = asyncio.get_running_loop()
+
+    def _matches_values(self, values: dict) -> bool:
+        # Events without a status (category changes) or without either key
+        # (imports) concern every view, so a missing key always matches
+        if self.status and values.get("status", _ANY) not in (_ANY, self.status):
+            return False
+        if self.category_id and values.get("category_id", _ANY) not in (_ANY, self.category_id):
+            return False
+        return True
+
+    def matches(self, event: dict) -> bool:
+        if self._matches_values(event):
+            return True
+        return "previous" in event and self._matches_values(event["previous"])
+
+    def deliver(self, event: dict):
+        """Queue ``event`` for this subscriber; callable from any thread."""
+        if event is RESYNC or self.matches(event):
+            self._loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: dict):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog rather than slow the publisher
+            # or grow without bound
+            self.dropped += self._queue.qsize()
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESYNC)
+
+    async def get(self) -> dict:
+        return await self._queue.get()
+
+
+class Broker(ABC):
+    def __init__(self):
+        self.subscriptions: Set[Subscription] = set()
+
+    @property
+    def active(self) -> bool:
+        """Whether anyone may be listening; publishers skip building events otherwise."""
+        return bool(self.subscriptions)
+
+    async def subscribe(self, status: Optional[str] = None, category_id: Optional[int] = None) -> Subscription:
+        subscription = Subscription(status, category_id, maxsize=settings.EVENTS_QUEUE_SIZE)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+
+    def dispatch(self, event: dict):
+        for subscription in list(self.subscriptions):
+            subscription.deliver(event)
+
+    @abstractmethod
+    async def publish_many(self, events: List[dict]):
+        ...
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "broker": type(self).__name__,
+            "subscribers": len(self.subscriptions),
+            "dropped": sum(subscription.dropped for subscription in self.subscriptions),
+        }
+
+
+class MemoryBroker(Broker):
+    async def publish_many(self, events):
+        for event in events:
+            self.dispatch(event)
+
+
+class PostgresBroker(Broker):
+    """Fan-out through PostgreSQL LISTEN/NOTIFY on a dedicated asyncpg connection."""
+
+    channel = "taskflow_events"
+    # NOTIFY payloads are limited to 8000 bytes; larger events lose their body
+    max_payload = 7900
+
+    def __init__(self, database_url: str):
+        super().__init__()
+        self._dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._connection = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def active(self) -> bool:
+        return True  # other workers may have subscribers
+
+    async def _connect(self):
+        import asyncpg
+
+        async with self._lock:
+            if self._connection is None or self._connection.is_closed():
+                connection = await asyncpg.connect(self._dsn)
+                await connection.add_listener(self.channel, self._on_notify)
+                connection.add_termination_listener(self._on_terminated)
+                self._connection = connection
+            return self._connection
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.dispatch(json.loads(payload))
+
+    def _on_terminated(self, connection):
+        logger.warning("Event listener connection lost; subscribers will resync")
+        self._connection = None
+        self.dispatch(RESYNC)
+
+    async def subscribe(self, status=None, category_id=None) -> Subscription:
+        await self._connect()
+        return await super().subscribe(status, category_id)
+
+    def _payload(self, event: dict) -> str:
+        payload = json.dumps(event, separators=(",", ":"))
+        if len(payload.encode()) > self.max_payload:
+            payload = json.dumps({key: value for key, value in event.items() if key not in ("task", "category")})
+        return payload
+
+    async def publish_many(self, events):
+        if not events:
+            return
+        connection = await self._connect()
+        async with self._lock:
+            # One round trip for the whole batch; delivered to this worker's
+            # subscribers through its own LISTEN
+            await connection.execute(
+                "SELECT pg_notify($1, payload) FROM unnest($2::text[]) AS payload",
+                self.channel, [self._payload(event) for event in events],
+            )
+
+    async def close(self):
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+def make_broker() -> Broker:
+    if settings.EVENTS_BROKER == "postgres":
+        return PostgresBroker(settings.DATABASE_URL)
+    if settings.EVENTS_BROKER == "memory":
+        return MemoryBroker()
+    raise ValueError(f"Unknown EVENTS_BROKER: {settings.EVENTS_BROKER} (expected 'memory' or 'postgres')")
+
+
+_broker: Optional[Broker] = None
+
+
+def get_broker() -> Broker:
+    """This process's broker, created on first use."""
+    global _broker
+    if _broker is None:
+        _broker = make_broker()
+    return _broker
+
+
+async def close_broker():
+    global _broker
+    broker, _broker = _broker, None
+    if broker is not None:
+        await broker.close()
+
+
+async def publish(build_events: Callable[[], Iterable[dict]]):
+    """Publish the events returned by ``build_events()``, which only runs if anyone listens."""
+    broker = get_broker()
+    if not broker.active:
+        return
+    try:
+        await broker.publish_many(list(build_events()))
+    except Exception:
+        # The write has committed; a lost notification must not fail it
+        logger.exception("Failed to publish change events")
@@ -0,0 +1,124 @@
+"""Streaming task export.
+
+Rows are read through a server-side cursor in ``EXPORT_BATCH_SIZE`` batches
+and each batch is encoded and sent before the next one is fetched, so memory
+stays flat however many tasks match.
+"""
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import Category, Task
+from backend.tags import task_tag_names
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+TASK_COLUMNS = (
+    Task.id,
+    Task.title,
+    Task.description,
+    Task.status,
+    Task.priority,
+    Task.due_date,
+    Task.category_id,
+    Task.created_at,
+    Task.updated_at,
+)
+CATEGORY_COLUMNS = (
+    Category.name.label("category_name"),
+    Category.color.label("category_color"),
+)
+CSV_HEADER = [column.key for column in TASK_COLUMNS] + [column.key for column in CATEGORY_COLUMNS] + ["tags"]
+
+
+def export_statement():
+    """Tasks with their category joined and their tag names, as plain column tuples in id order."""
+    return (
+        select(*TASK_COLUMNS, *CATEGORY_COLUMNS, task_tag_names())
+        .outerjoin(Category, Task.category_id == Category.id)
+        .order_by(Task.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, list):
+        # Tags, "|"-separated as the CSV import reads them
+        return "|".join(sorted(value))
+    return value
+
+
+def _ndjson_batch(rows) -> bytes:
+    lines = []
+    for row in rows:
+        record = {column.key: _plain(value) for column, value in zip(TASK_COLUMNS, row)}
+        record["category"] = None
+        if row.category_id is not None:
+            record["category"] = {"id": row.category_id, "name": row.category_name, "color": row.category_color}
+        record["tags"] = sorted(row.tags or ())
+        lines.append(json.dumps(record, separators=(",", ":")))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _csv_rows(rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+def _csv_header() -> bytes:
+    return _csv_rows([CSV_HEADER])
+
+
+ENCODERS = {
+    "ndjson": _ndjson_batch,
+    "csv": _csv_rows,
+}
+
+
+def stream_export(db, statement, export_format: str):
+    """Iterator of encoded chunks for StreamingResponse, one per fetched batch.
+
+    The request's session dependency has already been closed when the body is
+    streamed, so the stream reopens the session and closes it when done.
+    """
+    encode = ENCODERS[export_format]
+    if isinstance(db, AsyncSession):
+        return _stream_async(db, statement, export_format, encode)
+    return _stream_sync(db, statement, export_format, encode)
+
+
+def _stream_sync(db, statement, export_format, encode):
+    try:
+        if export_format == "csv":
+            yield _csv_header()
+        for batch in db.execute(statement).partitions():
+            yield encode(batch)
+    finally:
+        db.close()
+
+
+async def _stream_async(db, statement, export_format, encode):
+    try:
+        if export_format == "csv":
+            yield _csv_header()
+        result = await db.stream(statement)
+        async for batch in result.partitions():
+            yield encode(batch)
+    finally:
+        await db.close()
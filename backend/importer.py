@@ -0,0 +1,349 @@
+"""Streaming task import from CSV or NDJSON request bodies.
+
+The body is decoded and split into records as it arrives. Records are
+validated against TaskCreate and inserted in chunks of ``IMPORT_BATCH_SIZE``,
+each chunk in its own transaction, using COPY on PostgreSQL when no row of
+the chunk has tags or a reminder. Invalid rows are reported individually and
+never abort the import, and only a bounded number of row errors is kept, so
+memory does not grow with the size of the upload.
+"""
+import codecs
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+
+from backend.database import run_db
+from backend.models import Task, utcnow
+from backend.reminders import schedule_reminders
+from backend.tags import set_task_tags
+from backend.schemas import ImportResult, ImportRowError, TaskCreate
+
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+# A record (an NDJSON line, or a CSV record whose quoted fields may span
+# lines) is buffered whole; past this many characters it is reported as a
+# row error and skipped. The csv module refuses longer fields anyway
+# (csv.field_size_limit())
+MAX_RECORD_SIZE = 128 * 1024
+
+COPY_COLUMNS = ("title", "description", "status", "priority", "due_date", "category_id", "updated_at")
+
+# CSV cells holding lists separate their items with "|"
+CSV_LIST_FIELDS = {"tags"}
+
+
+class _LineBuffer:
+    """Splits decoded text into lines of at most ``max_length`` characters.
+
+    Only newly decoded text is scanned, and the pieces of a line are joined
+    once, when it ends. A longer line is dropped as it arrives and comes out
+    as None.
+    """
+
+    def __init__(self, max_length: int):
+        self.max_length = max_length
+        self._pieces: List[str] = []
+        self._size = 0
+        self._too_long = False
+
+    def _add(self, piece: str):
+        if self._too_long:
+            return
+        self._size += len(piece)
+        if self._size > self.max_length:
+            self._pieces, self._too_long = [], True
+        else:
+            self._pieces.append(piece)
+
+    def _take(self) -> Optional[str]:
+        line = None if self._too_long else "".join(self._pieces).rstrip("\r")
+        self._pieces, self._size, self._too_long = [], 0, False
+        return line
+
+    def feed(self, text: str) -> List[Optional[str]]:
+        first, *ended = text.split("\n")
+        self._add(first)
+        if not ended:
+            return []
+        rest = ended.pop()
+        # Only the first piece continues a buffered line; the others are whole
+        lines = [self._take()]
+        lines += [line.rstrip("\r") if len(line) <= self.max_length else None for line in ended]
+        self._add(rest)
+        return lines
+
+    def close(self) -> List[Optional[str]]:
+        return [self._take()] if self._size or self._too_long else []
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_length: int) -> AsyncIterator[Optional[str]]:
+    """Decode a byte stream as UTF-8 and yield its lines without line endings.
+
+    Lines longer than ``max_length`` characters are not buffered; each yields None.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = _LineBuffer(max_length)
+    async for chunk in chunks:
+        for line in buffer.feed(decoder.decode(chunk)):
+            yield line
+    for line in buffer.feed(decoder.decode(b"", final=True)) + buffer.close():
+        yield line
+
+
+def _too_long() -> str:
+    return f"Record longer than {MAX_RECORD_SIZE} characters"
+
+
+async def _ndjson_records(lines):
+    row = 0
+    async for line in lines:
+        if line is None:
+            row += 1
+            yield row, None, _too_long()
+            continue
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row, None, "Expected a JSON object"
+            continue
+        yield row, record, None
+
+
+def _csv_value(field: str, value: str):
+    if value == "":
+        return None
+    if field in CSV_LIST_FIELDS:
+        return [item.strip() for item in value.split("|") if item.strip()]
+    return value
+
+
+async def _csv_records(lines):
+    header: Optional[List[str]] = None
+    row = 0
+    record_lines: List[str] = []
+    size = 0
+    # Quote parity of the record so far, kept per line so that a field
+    # spanning many lines is not rescanned for each of them
+    quoted = False
+    skipping = False
+    async for line in lines:
+        if line is None:
+            # A line over the limit ends the record it was part of
+            if header is not None:
+                row += 1
+            yield row, None, _too_long()
+            record_lines, size, quoted, skipping = [], 0, False, False
+            continue
+        if line.count('"') % 2:
+            quoted = not quoted
+        if skipping:
+            # Drop the rest of an oversized record, up to its closing quote
+            skipping = quoted
+            continue
+        record_lines.append(line)
+        size += len(line) + 1
+        if quoted:
+            # A quoted field continues on the next line
+            if size > MAX_RECORD_SIZE:
+                row += 1
+                yield row, None, f"{_too_long()} (unterminated quoted field?)"
+                record_lines, size, skipping = [], 0, True
+            continue
+        text = "\n".join(record_lines)
+        record_lines, size = [], 0
+        if not text.strip():
+            continue
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as e:
+            # An unquoted line can still hold a field over the csv module's limit
+            if header is not None:
+                row += 1
+            yield row, None, f"Invalid CSV: {e}"
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row, {name: _csv_value(name, value) for name, value in zip(header, values) if name}, None
+    if record_lines:
+        yield row + 1, None, "Unterminated quoted field"
+
+
+def iter_records(chunks: AsyncIterator[bytes], import_format: str):
+    """Yield ``(row, record, error)`` for each data row of the upload."""
+    lines = iter_lines(chunks, MAX_RECORD_SIZE)
+    return _csv_records(lines) if import_format == "csv" else _ndjson_records(lines)
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[ImportRowError] = []
+        self.errors_truncated = False
+
+    def fail(self, row: int, errors: List[dict]):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(ImportRowError(row=row, errors=errors))
+        else:
+            self.errors_truncated = True
+
+    def result(self) -> ImportResult:
+        return ImportResult(
+            processed=self.processed,
+            inserted=self.inserted,
+            failed=self.failed,
+            errors=sorted(self.errors, key=lambda error: error.row),
+            errors_truncated=self.errors_truncated,
+        )
+
+
+def _copy_values(row: dict, now: datetime) -> tuple:
+    # COPY skips Python-side column defaults, and delta sync pages by
+    # updated_at, so it is set here. SQLAlchemy stores Enum columns by member
+    # name, so COPY must too
+    row = {**row, "updated_at": now}
+    return tuple(
+        value.name if isinstance(value, enum.Enum) else value
+        for value in (row.get(column) for column in COPY_COLUMNS)
+    )
+
+
+def _csv_field(value) -> str:
+    if value is None:
+        return ""  # unquoted empty is NULL in COPY's csv format
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return str(value)
+
+
+def _copy_rows(db: Session, rows: List[dict]) -> bool:
+    """COPY ``rows`` into tasks on PostgreSQL. Returns False when COPY is unavailable."""
+    connection = db.connection()
+    if connection.dialect.name != "postgresql":
+        return False
+    table = Task.__table__.name
+    now = utcnow()
+    if connection.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(",".join(_csv_field(value) for value in _copy_values(row, now)))
+            buffer.write("\n")
+        buffer.seek(0)
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        return True
+    if connection.dialect.driver == "asyncpg":
+        # run_sync executes this inside a greenlet, where await_only may await the driver
+        await_only(connection.connection.driver_connection.copy_records_to_table(
+            table, records=[_copy_values(row, now) for row in rows], columns=COPY_COLUMNS,
+        ))
+        return True
+    return False
+
+
+def _row_errors(dialect) -> tuple:
+    """Exception types meaning that some row of a batch is bad.
+
+    COPY raises the driver's own exceptions rather than DBAPIError. Anything
+    else, such as a column missing from the schema, propagates.
+    """
+    errors = (IntegrityError, DataError)
+    if dialect.driver == "psycopg2":
+        errors += (dialect.dbapi.IntegrityError, dialect.dbapi.DataError)
+    elif dialect.driver == "asyncpg":
+        from asyncpg.exceptions import DataError as AsyncpgDataError, IntegrityConstraintViolationError
+        errors += (IntegrityConstraintViolationError, AsyncpgDataError)
+    return errors
+
+
+def _insert_batch(db: Session, values: List[dict], copy: bool = True):
+    """Insert validated rows with their tags and reminders; the caller commits.
+
+    ``copy=False`` skips COPY, so that errors come as DBAPIError.
+    """
+    tags = [data.get("tags") for data in values]
+    rows = [{key: value for key, value in data.items() if key != "tags"} for data in values]
+    if any(tags) or any(row["reminder"] is not None for row in rows):
+        # Tags and reminders need the new ids, which COPY does not return
+        ids = db.scalars(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows).all()
+        schedule_reminders(db, [task_id for task_id, row in zip(ids, rows) if row["reminder"] is not None])
+        set_task_tags(db, {task_id: names for task_id, names in zip(ids, tags) if names})
+    elif not (copy and _copy_rows(db, rows)):
+        db.execute(insert(Task), rows)
+
+
+def _insert_rows(db: Session, rows: List[Tuple[int, dict]], report: ImportReport):
+    values = [data for _, data in rows]
+    row_errors = _row_errors(db.get_bind().dialect)
+    try:
+        _insert_batch(db, values)
+        db.commit()
+        report.inserted += len(rows)
+        return
+    except row_errors:
+        db.rollback()
+
+    # Something in the batch violates a constraint: isolate it row by row
+    for row, data in rows:
+        try:
+            with db.begin_nested():
+                _insert_batch(db, [data], copy=False)
+            report.inserted += 1
+        except row_errors as e:
+            report.fail(row, [{"loc": [], "msg": str(getattr(e, "orig", e)).strip()}])
+    db.commit()
+
+
+def import_chunk(db: Session, records: List[Tuple[int, dict]], report: ImportReport):
+    """Validate one chunk of parsed records and insert the valid ones."""
+    rows = []
+    for row, record in records:
+        try:
+            task = TaskCreate.model_validate(record)
+        except ValidationError as e:
+            report.fail(row, [{"loc": list(error["loc"]), "msg": error["msg"]} for error in e.errors()])
+            continue
+        rows.append((row, task.model_dump()))
+    if rows:
+        _insert_rows(db, rows, report)
+
+
+async def import_tasks(db, chunks: AsyncIterator[bytes], import_format: str) -> ImportResult:
+    report = ImportReport()
+    chunk: List[Tuple[int, dict]] = []
+    async for row, record, error in iter_records(chunks, import_format):
+        report.processed += 1
+        if error:
+            report.fail(row, [{"loc": [], "msg": error}])
+            continue
+        chunk.append((row, record))
+        if len(chunk) >= IMPORT_BATCH_SIZE:
+            await run_db(db, import_chunk, chunk, report)
+            chunk = []
+    if chunk:
+        await run_db(db, import_chunk, chunk, report)
+    return report.result()
@@ -1,43 +1,77 @@
-from fastapi import FastAPI, Depends, Request
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-import logging
 
-# Fix these imports
-from backend.database import engine, Base, get_db
-from backend.routes import tasks, categories
+from backend.admission import AdmissionMiddleware
+from backend.database import close_database, get_database, get_db
+from backend import events, reminders
+from backend.routes import tasks, categories, events as event_routes, monitoring, sync
 from backend.config import settings
+from backend.metrics import MetricsMiddleware, metrics_endpoint
+from backend.pagination import NEXT_CURSOR_HEADER
+from backend.replicas import ReadYourWritesMiddleware
+from backend.response_cache import ETAG_HEADER
+
+# Importing this module reads no settings and opens no connection, so workers
+# start fast. The schema is managed separately: python -m backend.migrations upgrade
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_database()
+    scheduler = None
+    if settings.REMINDER_SCHEDULER:
+        scheduler = reminders.ReminderScheduler()
+        scheduler_task = asyncio.create_task(scheduler.run())
+    yield
+    if scheduler is not None:
+        scheduler.stop()
+        await scheduler_task
+    await events.close_broker()
+    await close_database()
 
 app = FastAPI(
     title="TaskFlow API",
     description="A FastAPI backend for the TaskFlow application",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
+def cors_middleware(app):
+    # Built with the middleware stack on startup, when settings are read
+    return CORSMiddleware(
+        app,
+        allow_origins=settings.CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER, "Retry-After"],
+    )
+
+# Sheds excess load before it reaches the handlers and the database; inside
+# CORS so that browsers can read its 429/503 responses
+app.add_middleware(AdmissionMiddleware, routes=app.router.routes)
+
 # Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app.add_middleware(cors_middleware)
+
+# Sends a client's reads to the primary right after its writes
+app.add_middleware(ReadYourWritesMiddleware)
 
-# Add this middleware before your other middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logging.info(f"Request: {request.method} {request.url.path} {request.scope.get('http_version', '')}")
-    response = await call_next(request)
-    return response
+# Outermost, so that latency includes the other middleware
+app.add_middleware(MetricsMiddleware)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 
 # Include routers
 app.include_router(tasks.router, prefix="/api/tasks", tags=["Tasks"])
 app.include_router(categories.router, prefix="/api/categories", tags=["Categories"])
+app.include_router(monitoring.router, prefix="/api/monitoring", tags=["Monitoring"])
+app.include_router(event_routes.router, prefix="/api/events", tags=["Events"])
+app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
 
 @app.get("/api/health")
 def health_check(db: Session = Depends(get_db)):
     """Health check endpoint to verify API is running and database is connected"""
-    return {"status": "healthy", "database": "connected"}
\ No newline at end of file
+    return {"status": "healthy", "database": "connected"}
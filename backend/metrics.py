@@ -0,0 +1,265 @@
+"""Request and SQL instrumentation, exported in the Prometheus text format.
+
+``MetricsMiddleware`` times every HTTP request and measures its response
+size, labelled by route template rather than raw path so that ids do not
+create new series. SQLAlchemy engine events count and time every statement
+executed while a request is being handled, for every engine, sync or async.
+``SLOW_QUERY_MS`` additionally logs statements slower than the threshold.
+
+Recording is a few dict lookups and additions under a lock per request and
+per statement; rendering happens only when ``/metrics`` is scraped.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from backend.config import settings
+
+slow_query_logger = logging.getLogger("backend.slow_queries")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound)) if isinstance(bound, float) else str(bound)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(labels)} {value}"
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._values: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(tuple(sorted(labels.items())))
+        return entry[2] if entry else 0
+
+    def sum(self, **labels: str) -> float:
+        entry = self._values.get(tuple(sorted(labels.items())))
+        return entry[1] if entry else 0.0
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._values.items()]
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _format_bound(bound)
+                yield f"{self.name}_bucket{_format_labels(labels, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(labels, le)} {count}"
+            yield f"{self.name}_sum{_format_labels(labels)} {total}"
+            yield f"{self.name}_count{_format_labels(labels)} {count}"
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to complete the response, by route and status.", LATENCY_BUCKETS
+)
+RESPONSE_SIZE = Histogram("http_response_size_bytes", "Response body size, by route.", SIZE_BUCKETS)
+REQUEST_QUERIES = Histogram(
+    "db_queries_per_request", "SQL statements executed while handling a request, by route.", QUERY_COUNT_BUCKETS
+)
+REQUEST_QUERY_TIME = Histogram(
+    "db_query_seconds_per_request", "Total SQL execution time of a request, by route.", LATENCY_BUCKETS
+)
+QUERY_LATENCY = Histogram("db_query_duration_seconds", "Execution time of each SQL statement.", LATENCY_BUCKETS)
+SLOW_QUERIES = Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS.")
+# Admission control (backend/admission.py); limiter is "global" or a route
+ADMISSION_IN_FLIGHT = Gauge("admission_in_flight", "Requests holding a slot, by limiter.")
+ADMISSION_QUEUE_DEPTH = Gauge("admission_queue_depth", "Requests waiting for a slot, by limiter.")
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds", "Time admitted requests waited for their slots, by priority.", LATENCY_BUCKETS
+)
+ADMISSION_SHED = Counter(
+    "admission_shed_total", "Requests refused by admission control, by limiter, priority and reason."
+)
+
+REGISTRY = [
+    REQUEST_LATENCY, RESPONSE_SIZE, REQUEST_QUERIES, REQUEST_QUERY_TIME, QUERY_LATENCY, SLOW_QUERIES,
+    ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_WAIT, ADMISSION_SHED,
+]
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+class RequestQueries:
+    """SQL statements of the current request; shared with its threadpool work via the context."""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+_request_queries: contextvars.ContextVar[Optional[RequestQueries]] = contextvars.ContextVar(
+    "request_queries", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    QUERY_LATENCY.observe(elapsed)
+    queries = _request_queries.get()
+    if queries is not None:
+        queries.count += 1
+        queries.seconds += elapsed
+    threshold = settings.SLOW_QUERY_MS
+    if threshold is not None and elapsed * 1000 >= threshold:
+        SLOW_QUERIES.inc()
+        slow_query_logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split())[:1000])
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Matched by a plain Starlette route, or not matched at all (404)
+    return scope["path"] if "endpoint" in scope else "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, response size and SQL use per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        queries = RequestQueries()
+        token = _request_queries.set(queries)
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_queries.reset(token)
+            route = route_label(scope)
+            method = scope["method"]
+            REQUEST_LATENCY.observe(time.perf_counter() - started, method=method, route=route, status=str(status_code))
+            RESPONSE_SIZE.observe(size, method=method, route=route)
+            REQUEST_QUERIES.observe(queries.count, method=method, route=route)
+            REQUEST_QUERY_TIME.observe(queries.seconds, method=method, route=route)
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint; every worker reports its own counters."""
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
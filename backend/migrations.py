@@ -0,0 +1,218 @@
+"""Versioned schema migrations.
+
+``Base.metadata.create_all`` only creates tables that are missing; it never
+adds columns or indexes to a table that already exists. Every change to an
+existing table is therefore registered here as a numbered migration, applied
+once and recorded in the ``schema_migrations`` table.
+
+A brand-new database is created from the models and stamped with the latest
+version. A database created before migrations existed is treated as version 1.
+
+The app does not touch the schema when it starts: run ``upgrade`` once per
+deploy, before the new code serves requests.
+
+Usage::
+
+    python -m backend.migrations upgrade
+    python -m backend.migrations current
+"""
+import logging
+import sys
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.schema import CreateIndex
+
+from backend.database import Base, get_database
+from backend import models
+
+logger = logging.getLogger(__name__)
+
+# Kept out of Base.metadata so that create_all/drop_all never touch it
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+# Arbitrary key for pg_advisory_lock so concurrent deploys apply migrations once
+_ADVISORY_LOCK_KEY = 7_380_221
+
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    apply: Callable
+    # Non-transactional migrations run on an AUTOCOMMIT connection, which is
+    # required for CREATE INDEX CONCURRENTLY on PostgreSQL.
+    transactional: bool = True
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str, transactional: bool = True):
+    def register(fn):
+        MIGRATIONS.append(Migration(version, description, fn, transactional))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return fn
+    return register
+
+
+def create_index(conn, index):
+    """Create ``index`` if it does not exist, without locking writes on PostgreSQL."""
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+    if conn.dialect.name == "postgresql":
+        ddl = ddl.replace(" INDEX ", " INDEX CONCURRENTLY ", 1)
+    conn.execute(text(ddl))
+
+
+def _table_index(table, name):
+    return next(index for index in table.indexes if index.name == name)
+
+
+@migration(1, "initial schema")
+def _initial_schema(conn):
+    Base.metadata.create_all(conn)
+
+
+@migration(2, "composite indexes for task filters and due-date sort", transactional=False)
+def _task_filter_indexes(conn):
+    for name in (
+        "ix_tasks_status_priority",
+        "ix_tasks_priority_category_id",
+        "ix_tasks_category_id_status_priority",
+        "ix_tasks_due_date_id",
+    ):
+        create_index(conn, _table_index(models.Task.__table__, name))
+
+
+@migration(3, "full-text search index on tasks", transactional=False)
+def _task_search_index(conn):
+    if conn.dialect.name == "postgresql":
+        create_index(conn, _table_index(models.Task.__table__, "ix_tasks_search"))
+
+
+@migration(4, "version columns for optimistic concurrency")
+def _version_columns(conn):
+    for table in (models.Category.__table__, models.Task.__table__):
+        if "version" not in {column["name"] for column in inspect(conn).get_columns(table.name)}:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+@migration(5, "updated_at on every task and category row, for delta sync")
+def _backfill_updated_at(conn):
+    for table in (models.Category.__table__, models.Task.__table__):
+        if conn.dialect.name == "sqlite":
+            # Rewrite every value in the format SQLAlchemy binds datetimes in,
+            # so that comparisons with them order correctly as strings
+            conn.execute(text(
+                f"UPDATE {table.name} SET updated_at = "
+                "strftime('%Y-%m-%d %H:%M:%f', coalesce(updated_at, created_at)) || '000'"
+            ))
+        else:
+            conn.execute(text(f"UPDATE {table.name} SET updated_at = created_at WHERE updated_at IS NULL"))
+
+
+@migration(6, "change indexes and tombstones for delta sync", transactional=False)
+def _sync_indexes(conn):
+    models.Tombstone.__table__.create(conn, checkfirst=True)
+    create_index(conn, _table_index(models.Category.__table__, "ix_categories_updated_at_id"))
+    create_index(conn, _table_index(models.Task.__table__, "ix_tasks_updated_at_id"))
+
+
+@migration(7, "task reminders and the reminder queue")
+def _reminders(conn):
+    if "reminder" not in {column["name"] for column in inspect(conn).get_columns("tasks")}:
+        column_type = models.Task.__table__.c.reminder.type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE tasks ADD COLUMN reminder {column_type}"))
+    models.Reminder.__table__.create(conn, checkfirst=True)
+
+
+@migration(8, "task tags")
+def _tags(conn):
+    models.Tag.__table__.create(conn, checkfirst=True)
+    models.TaskTag.__table__.create(conn, checkfirst=True)
+
+
+def head() -> int:
+    return MIGRATIONS[-1].version
+
+
+def current_version(conn) -> Optional[int]:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return None
+    return conn.execute(select(func.max(schema_migrations.c.version))).scalar()
+
+
+def _record(conn, migration_: Migration):
+    conn.execute(schema_migrations.insert().values(version=migration_.version, description=migration_.description))
+
+
+def _upgrade(engine):
+    with engine.begin() as conn:
+        migration_metadata.create_all(conn)
+        version = current_version(conn)
+        if version is None:
+            if not inspect(conn).has_table(models.Task.__tablename__):
+                # Fresh database: build the current schema in one go
+                Base.metadata.create_all(conn)
+                for m in MIGRATIONS:
+                    _record(conn, m)
+                logger.info("Created schema at version %s", head())
+                return
+            # Tables predate the migrations table
+            _record(conn, MIGRATIONS[0])
+            version = MIGRATIONS[0].version
+
+    for m in MIGRATIONS:
+        if m.version <= version:
+            continue
+        logger.info("Applying migration %s: %s", m.version, m.description)
+        if m.transactional:
+            with engine.begin() as conn:
+                m.apply(conn)
+                _record(conn, m)
+        else:
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                m.apply(conn)
+                _record(conn, m)
+
+
+def upgrade(engine):
+    """Apply every pending migration to the database behind ``engine``."""
+    if engine.dialect.name != "postgresql":
+        _upgrade(engine)
+        return
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        try:
+            _upgrade(engine)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "upgrade"
+    logging.basicConfig(level=logging.INFO)
+    engine = get_database().engine
+    if command == "upgrade":
+        upgrade(engine)
+    elif command == "current":
+        with engine.connect() as conn:
+            print(current_version(conn))
+    else:
+        print(f"Unknown command: {command} (expected 'upgrade' or 'current')", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
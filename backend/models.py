@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum, Text
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum, Text, Index, literal_column
+from sqlalchemy.dialects import postgresql  # noqa: F401  registers func.to_tsvector and friends
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import enum
 
 from .database import Base
@@ -15,6 +17,26 @@ class TaskPriority(str, enum.Enum):
     MEDIUM = "medium"
     HIGH = "high"
 
+def search_document(title, description):
+    """Full-text search document of a task.
+
+    Every part is a SQL literal rather than a bound parameter, so that queries
+    repeat the indexed expression exactly and PostgreSQL can use
+    ix_tasks_search for them.
+    """
+    return func.to_tsvector(
+        literal_column("'english'::regconfig"),
+        func.coalesce(title, literal_column("''")) + literal_column("' '") + func.coalesce(description, literal_column("''")),
+    )
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+# Every UPDATE issued through SQLAlchemy (flush, update() or bulk update)
+# bumps ``version``; writers that send the version they read get a conflict
+# instead of overwriting a newer change.
+ROW_VERSION_INCREMENT = literal_column("version + 1")
+
 class Category(Base):
     __tablename__ = "categories"
 
@@ -22,10 +44,17 @@ class Category(Base):
     name = Column(String, index=True)
     color = Column(String, default="#6D28D9")  # Default purple color
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set on insert too: delta sync (routes/sync.py) pages by (updated_at, id).
+    # Stamped by the application, so values have microseconds on every backend.
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=ROW_VERSION_INCREMENT)
 
     tasks = relationship("Task", back_populates="category")
 
+    __table_args__ = (
+        Index("ix_categories_updated_at_id", "updated_at", "id"),
+    )
+
 class Task(Base):
     __tablename__ = "tasks"
 
@@ -35,8 +64,85 @@ class Task(Base):
     status = Column(Enum(TaskStatus), default=TaskStatus.PENDING)
     priority = Column(Enum(TaskPriority), default=TaskPriority.MEDIUM)
     due_date = Column(DateTime(timezone=True), nullable=True)
+    # When to remind about the task; backend/reminders.py fires it
+    reminder = Column(DateTime(timezone=True), nullable=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=ROW_VERSION_INCREMENT)
+
+    category = relationship("Category", back_populates="tasks")
+
+    # Composite indexes for the read_tasks filters: every combination of
+    # status, priority and category_id has one of these as a leading prefix.
+    # Existing databases get them from backend/migrations.py.
+    __table_args__ = (
+        Index("ix_tasks_status_priority", "status", "priority"),
+        Index("ix_tasks_priority_category_id", "priority", "category_id"),
+        Index("ix_tasks_category_id_status_priority", "category_id", "status", "priority"),
+        Index("ix_tasks_due_date_id", "due_date", "id"),
+        Index("ix_tasks_updated_at_id", "updated_at", "id"),
+        # Full-text search (backend/search.py); other databases use an
+        # in-memory index instead
+        Index("ix_tasks_search", search_document(title, description), postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+TASK_SEARCH_DOCUMENT = search_document(Task.title, Task.description)
+
+
+class Tombstone(Base):
+    """A deleted task or category, kept so that delta sync can report the deletion."""
+    __tablename__ = "tombstones"
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)  # table name of the deleted row
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+    __table_args__ = (
+        Index("ix_tombstones_deleted_at_id", "deleted_at", "id"),
+    )
+
+
+class Reminder(Base):
+    """A task reminder waiting to fire.
+
+    One row per task with a ``reminder`` in the future or not yet fired.
+    Scheduler workers claim rows for a lease (``claimed_by`` and
+    ``claimed_until``) and delete them when they fire.
+    """
+    __tablename__ = "reminders"
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, unique=True)
+    fire_at = Column(DateTime(timezone=True), nullable=False)
+    claimed_by = Column(String, nullable=True)
+    claimed_until = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_reminders_fire_at_id", "fire_at", "id"),
+    )
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class TaskTag(Base):
+    """A tag on a task.
+
+    The primary key leads with ``tag_id`` so that tag filters and counts read
+    each tag's tasks from the index; ``ix_task_tags_task_id`` serves the tags
+    of one task.
+    """
+    __tablename__ = "task_tags"
+
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
 
-    category = relationship("Category", back_populates="tasks")
\ No newline at end of file
+    __table_args__ = (
+        Index("ix_task_tags_task_id", "task_id"),
+    )
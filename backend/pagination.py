@@ -0,0 +1,93 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _nullable(column) -> bool:
+    return getattr(column.expression, "nullable", True)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(sort: str, values: Sequence) -> str:
+    """Encode the sort key of the last row of a page as an opaque token."""
+    payload = json.dumps({"s": sort, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(v) for v in payload["v"]]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if payload.get("s") != sort:
+        raise InvalidCursor(f"Cursor was issued for sort '{payload.get('s')}', not '{sort}'")
+    return values
+
+
+def order_by_keys(keys):
+    """Ascending ORDER BY for a keyset, with NULLs sorting last on every backend."""
+    return [key.asc().nulls_last() if _nullable(key) else key.asc() for key in keys]
+
+
+def after_keys(keys, values):
+    """WHERE clause matching rows that sort strictly after ``values``.
+
+    Expands ``(a, b) > (x, y)`` into ``a > x OR (a = x AND b > y)`` so it
+    works on every backend, and treats NULL as larger than any value to agree
+    with ``order_by_keys``.
+    """
+    clauses = []
+    for i, (key, value) in enumerate(zip(keys, values)):
+        prefix = [k.is_(None) if v is None else k == v for k, v in zip(keys[:i], values[:i])]
+        if value is None:
+            # Nothing sorts after NULL within this column
+            continue
+        greater = key > value
+        if _nullable(key):
+            greater = or_(greater, key.is_(None))
+        clauses.append(and_(*prefix, greater))
+    return or_(*clauses)
+
+
+def paginate(query, keys, sort: str, limit: int, skip: int = 0, cursor: Optional[str] = None):
+    """Return one page of ``query`` ordered by ``keys`` and the cursor for the next page.
+
+    With a cursor the page starts right after the row it encodes, so every
+    page costs the same index range scan however deep it is; without one the
+    legacy ``skip`` offset is used. ``next_cursor`` is None on the last page.
+    """
+    query = query.order_by(*order_by_keys(keys))
+    if cursor:
+        query = query.filter(after_keys(keys, decode_cursor(cursor, sort)))
+    else:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, [getattr(last, key.key) for key in keys])
+    return rows, next_cursor
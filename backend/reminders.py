@@ -0,0 +1,237 @@
+"""Task reminders: the queue the API writes and the scheduler that fires it.
+
+Setting a task's ``reminder`` puts one row in the ``reminders`` table, in the
+same transaction as the task write. Scheduler workers share that queue:
+
+* Every ``REMINDER_POLL_SECONDS`` a worker claims up to
+  ``REMINDER_BATCH_SIZE`` reminders due within ``REMINDER_HORIZON_SECONDS``
+  with one ``UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED)``
+  on the ``(fire_at, id)`` index. Concurrent workers skip each other's rows
+  instead of waiting on them, and a claim is a lease: the reminders of a
+  worker that dies are claimed by another once it runs out.
+* Claimed reminders wait in an in-memory heap and fire on time without
+  further polling. Firing deletes the rows still claimed by this worker and
+  dispatches only those, so a reminder whose lease was taken over fires once,
+  by its new owner. Dispatch happens after the delete commits: a reminder
+  fires at most once, and a worker crashing in between loses it.
+
+The default dispatch publishes a ``task.reminder`` change event (see
+``backend.events``; use ``EVENTS_BROKER=postgres`` so that a scheduler
+process reaches the API workers' subscribers).
+
+Run workers with ``python -m backend.reminders``, or set
+``REMINDER_SCHEDULER=true`` to run one inside each API process.
+"""
+import asyncio
+import heapq
+import logging
+import signal
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from backend import events
+from backend.config import settings
+from backend.models import Reminder, Task, utcnow
+
+logger = logging.getLogger(__name__)
+
+reminders = Reminder.__table__
+tasks = Task.__table__
+
+
+def cancel_reminders(db: Session, task_ids: Iterable[int]):
+    """Drop the queued reminders of these tasks; the caller commits."""
+    task_ids = list(task_ids)
+    if task_ids:
+        db.execute(delete(reminders).where(reminders.c.task_id.in_(task_ids)))
+
+
+def schedule_reminders(db: Session, task_ids: Iterable[int]):
+    """Queue the current ``reminder`` of each task, replacing what was queued; the caller commits.
+
+    Run after the task write, so that the task row lock orders concurrent
+    updates of the same task.
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return
+    cancel_reminders(db, task_ids)
+    db.execute(insert(reminders).from_select(
+        ["task_id", "fire_at"],
+        select(tasks.c.id, tasks.c.reminder).where(tasks.c.id.in_(task_ids), tasks.c.reminder.isnot(None)),
+    ))
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite returns naive datetimes; everything stored is UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def claim_reminders(db: Session, worker: str, limit: int, horizon: float, lease: float) -> List[Tuple[datetime, int]]:
+    """Claim up to ``limit`` unclaimed reminders due within ``horizon`` seconds; returns ``(fire_at, id)``."""
+    now = utcnow()
+    until = now + timedelta(seconds=horizon)
+    due = (
+        select(reminders.c.id)
+        .where(
+            reminders.c.fire_at <= until,
+            or_(reminders.c.claimed_until.is_(None), reminders.c.claimed_until < now),
+        )
+        .order_by(reminders.c.fire_at, reminders.c.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.execute(
+        update(reminders)
+        .where(reminders.c.id.in_(due.scalar_subquery()))
+        # The lease outlasts the latest fire time of the batch
+        .values(claimed_by=worker, claimed_until=until + timedelta(seconds=lease))
+        .returning(reminders.c.fire_at, reminders.c.id)
+    ).all()
+    db.commit()
+    return [(_aware(fire_at), reminder_id) for fire_at, reminder_id in rows]
+
+
+def fire_reminders(db: Session, worker: str, reminder_ids: List[int]) -> list:
+    """Delete the reminders still claimed by ``worker``; returns their tasks, to dispatch."""
+    task_ids = db.scalars(
+        delete(reminders)
+        .where(reminders.c.id.in_(reminder_ids), reminders.c.claimed_by == worker)
+        .returning(reminders.c.task_id)
+    ).all()
+    fired = db.execute(select(tasks).where(tasks.c.id.in_(task_ids))).all() if task_ids else []
+    db.commit()
+    return fired
+
+
+def release_reminders(db: Session, worker: str, reminder_ids: List[int]):
+    """Hand back claimed reminders that did not fire, so other workers need not wait for the lease."""
+    if reminder_ids:
+        db.execute(
+            update(reminders)
+            .where(reminders.c.id.in_(reminder_ids), reminders.c.claimed_by == worker)
+            .values(claimed_by=None, claimed_until=None)
+        )
+        db.commit()
+
+
+async def publish_reminders(fired: list):
+    await events.publish(lambda: [events.task_event("reminder", task) for task in fired])
+
+
+class ReminderScheduler:
+    """One worker: claims batches of due reminders and fires them from a timer heap."""
+
+    def __init__(
+        self,
+        dispatch: Callable[[list], Awaitable[None]] = publish_reminders,
+        session_factory: Optional[Callable[[], Session]] = None,
+        worker: Optional[str] = None,
+    ):
+        self.dispatch = dispatch
+        self.session_factory = session_factory
+        self.worker = worker or uuid.uuid4().hex
+        self.batch_size = settings.REMINDER_BATCH_SIZE
+        self.horizon = settings.REMINDER_HORIZON_SECONDS
+        self.lease = settings.REMINDER_LEASE_SECONDS
+        self.poll_interval = settings.REMINDER_POLL_SECONDS
+        self._heap: List[Tuple[datetime, int]] = []
+        self._stopping = asyncio.Event()
+        self.claimed = 0
+        self.fired = 0
+
+    async def _run(self, fn, *args):
+        def in_session():
+            factory = self.session_factory
+            if factory is None:
+                from backend.database import get_database
+                factory = get_database().SessionLocal
+            with factory() as db:
+                return fn(db, self.worker, *args)
+
+        return await run_in_threadpool(in_session)
+
+    async def claim(self) -> bool:
+        """Claim one batch into the heap; True if the batch was full, so more may be due."""
+        claimed = await self._run(claim_reminders, self.batch_size, self.horizon, self.lease)
+        for item in claimed:
+            heapq.heappush(self._heap, item)
+        self.claimed += len(claimed)
+        return len(claimed) == self.batch_size
+
+    async def fire_due(self) -> int:
+        """Fire every claimed reminder whose time has come."""
+        now = utcnow()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[1])
+        if not due:
+            return 0
+        fired = await self._run(fire_reminders, due)
+        if fired:
+            try:
+                await self.dispatch(fired)
+            except Exception:
+                logger.exception("Failed to dispatch %d reminders", len(fired))
+        self.fired += len(fired)
+        return len(fired)
+
+    def _next_wakeup(self, next_poll: datetime) -> float:
+        wakeup = min(next_poll, self._heap[0][0]) if self._heap else next_poll
+        return max(0.0, (wakeup - utcnow()).total_seconds())
+
+    async def run(self):
+        """Claim and fire until ``stop()``, then release what did not fire."""
+        next_poll = utcnow()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    if utcnow() >= next_poll:
+                        full = await self.claim()
+                        # A full batch means a backlog: claim again right away
+                        next_poll = utcnow() + timedelta(seconds=0 if full else self.poll_interval)
+                    await self.fire_due()
+                except Exception:
+                    # Reminders claimed but not fired go back to the queue when their lease ends
+                    logger.exception("Reminder scheduler %s failed; retrying", self.worker)
+                    next_poll = utcnow() + timedelta(seconds=self.poll_interval)
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self._next_wakeup(next_poll))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            pending, self._heap = [reminder_id for _, reminder_id in self._heap], []
+            await self._run(release_reminders, pending)
+
+    def stop(self):
+        self._stopping.set()
+
+    def stats(self) -> dict:
+        return {"worker": self.worker, "pending": len(self._heap), "claimed": self.claimed, "fired": self.fired}
+
+
+async def _serve():
+    scheduler = ReminderScheduler()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, scheduler.stop)
+    logger.info("Reminder scheduler %s started", scheduler.worker)
+    try:
+        await scheduler.run()
+    finally:
+        await events.close_broker()
+    logger.info("Reminder scheduler %s stopped: %s", scheduler.worker, scheduler.stats())
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Read replicas for the read-only endpoints.
+
+Handlers that only read take their session from ``get_read_db``, which
+hands out a session on one of ``DATABASE_REPLICA_URLS`` in turn and falls
+back to the primary when:
+
+* the client wrote within ``REPLICA_LAG_SECONDS``. ``ReadYourWritesMiddleware``
+  marks such clients with a cookie on every successful write, so a client
+  reads its own writes whichever worker served them;
+* no replica is healthy. A replica whose connection fails is skipped for
+  ``REPLICA_RETRY_SECONDS``, then tried again.
+
+Writes and everything else keep using ``get_db`` and the primary.
+"""
+import itertools
+import math
+import threading
+import time
+from typing import List, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.datastructures import MutableHeaders
+
+from backend.config import settings
+from backend.pool import engine_options
+
+WRITE_COOKIE = "taskflow_last_write"
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class Replica:
+    """Engines and session factories of one read replica, and its health."""
+
+    def __init__(self, url: str, async_url: Optional[str] = None):
+        self.url = url
+        self.engine = create_engine(url, **engine_options(url))
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        event.listen(self.engine, "handle_error", self._on_error)
+
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        if async_url is not None:
+            self.async_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+            self.AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+            event.listen(self.async_engine.sync_engine, "handle_error", self._on_error)
+
+        self.down_until = 0.0
+        self.failures = 0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self):
+        self.failures += 1
+        self.down_until = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+
+    def _on_error(self, context):
+        # A lost connection, not a bad query, takes the replica out of rotation
+        if context.is_disconnect:
+            self.mark_down()
+
+    def session(self):
+        return self.AsyncSessionLocal() if self.AsyncSessionLocal is not None else self.SessionLocal()
+
+    async def dispose(self):
+        self.engine.dispose()
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+
+    def status(self) -> dict:
+        return {"healthy": self.healthy, "failures": self.failures}
+
+
+class ReplicaSet:
+    """Round-robin over the healthy replicas."""
+
+    def __init__(self, replicas: List[Replica]):
+        self.replicas = replicas
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        """The next healthy replica, or None if there is none."""
+        with self._lock:
+            start = next(self._turn)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+        return None
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.dispose()
+
+
+def wrote_recently(request: Request) -> bool:
+    """Whether the client made a write within REPLICA_LAG_SECONDS, per its cookie."""
+    try:
+        written_at = float(request.cookies.get(WRITE_COOKIE, ""))
+    except ValueError:
+        return False
+    return time.time() - written_at < settings.REPLICA_LAG_SECONDS
+
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware setting the write cookie on successful writes.
+
+    Only active with replicas configured; the cookie expires once replicas
+    are assumed to have caught up.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not settings.DATABASE_REPLICA_URLS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{WRITE_COOKIE}={time.time():.3f}; Max-Age={math.ceil(settings.REPLICA_LAG_SECONDS)}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,241 @@
+"""Cached, conditional JSON responses for the read endpoints.
+
+Entries are keyed by path, query string and a *generation* counter per
+namespace ("tasks", "categories"). Writes bump the generation of what they
+touch, which orphans every cached page of that namespace in O(1); orphans
+age out of the LRU. Each entry carries an ETag derived from the versions
+(``version`` column) of the rows it contains plus the generations,
+so ``If-None-Match`` is answered with 304 without touching the database or
+serializing anything when the entry is cached, and without serializing when
+it is not.
+
+The default backend is an in-process LRU. Set ``RESPONSE_CACHE_URL`` to a
+``redis://`` URL to share entries and generations between workers, so a
+write handled by one worker invalidates the cache of all of them.
+"""
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from backend.cache import TTLCache
+from backend.config import settings
+from backend.replicas import wrote_recently
+
+ETAG_HEADER = "ETag"
+
+
+@dataclass
+class CachedResponse:
+    etag: str
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class CacheBackend(ABC):
+    """Storage for cached responses and namespace generation counters.
+
+    The methods are coroutines because they run on the event loop: a backend
+    that goes over the network must not block it.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, entry: CachedResponse):
+        ...
+
+    @abstractmethod
+    async def generations(self, namespaces: Sequence[str]) -> List[int]:
+        ...
+
+    @abstractmethod
+    async def bump(self, namespace: str):
+        ...
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache("responses", maxsize=maxsize, ttl=ttl)
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    async def get(self, key):
+        return self._entries.get(key)
+
+    async def set(self, key, entry):
+        self._entries.set(key, entry)
+
+    async def generations(self, namespaces):
+        return [self._generations.get(namespace, 0) for namespace in namespaces]
+
+    async def bump(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    async def clear(self):
+        self._entries.clear()
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared backend; needs the optional ``redis`` package (4.2 or later, for redis.asyncio).
+
+    ``client`` replaces the client built from ``url``.
+    """
+
+    prefix = "taskflow:response-cache:"
+
+    def __init__(self, url: str, ttl: float, client=None):
+        if client is None:
+            try:
+                from redis import asyncio as redis
+            except ImportError as e:
+                raise RuntimeError("RESPONSE_CACHE_URL points to Redis but the 'redis' package is not installed") from e
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self._ttl = int(ttl)
+
+    async def get(self, key):
+        raw = await self._client.get(self.prefix + "entry:" + key)
+        if raw is None:
+            return None
+        meta, _, body = raw.partition(b"\n")
+        meta = json.loads(meta)
+        return CachedResponse(etag=meta["etag"], body=body, headers=meta["headers"])
+
+    async def set(self, key, entry):
+        meta = json.dumps({"etag": entry.etag, "headers": entry.headers}).encode()
+        await self._client.set(self.prefix + "entry:" + key, meta + b"\n" + entry.body, ex=self._ttl)
+
+    async def generations(self, namespaces):
+        values = await self._client.mget([self.prefix + "generation:" + namespace for namespace in namespaces])
+        return [int(value or 0) for value in values]
+
+    async def bump(self, namespace):
+        await self._client.incr(self.prefix + "generation:" + namespace)
+
+    async def clear(self):
+        async for key in self._client.scan_iter(self.prefix + "entry:*"):
+            await self._client.delete(key)
+
+
+def make_backend() -> CacheBackend:
+    url = settings.RESPONSE_CACHE_URL
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url, ttl=settings.RESPONSE_CACHE_TTL)
+    if url:
+        raise ValueError(f"Unsupported RESPONSE_CACHE_URL: {url}")
+    return MemoryCacheBackend(maxsize=settings.RESPONSE_CACHE_SIZE, ttl=settings.RESPONSE_CACHE_TTL)
+
+
+class ResponseCache:
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self._backend = backend
+        self._invalidated_at = float("-inf")
+
+    @property
+    def backend(self) -> CacheBackend:
+        # Configured from Settings on first use rather than at import
+        if self._backend is None:
+            self._backend = make_backend()
+        return self._backend
+
+    async def key(self, namespaces: Sequence[str], request: Request) -> str:
+        generations = await self.backend.generations(namespaces)
+        scope = ",".join(f"{namespace}={generation}" for namespace, generation in zip(namespaces, generations))
+        query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+        return f"{scope}|{request.url.path}?{query}"
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        return await self.backend.get(key)
+
+    async def set(self, key: str, entry: CachedResponse):
+        await self.backend.set(key, entry)
+
+    async def invalidate(self, *namespaces: str):
+        """Call after a write commits, for every namespace whose responses it changes."""
+        for namespace in namespaces:
+            await self.backend.bump(namespace)
+        self._invalidated_at = time.monotonic()
+
+    def invalidated_within(self, seconds: float) -> bool:
+        """Whether this process invalidated anything in the last ``seconds``."""
+        return time.monotonic() - self._invalidated_at < seconds
+
+    async def clear(self):
+        await self.backend.clear()
+
+
+response_cache = ResponseCache()
+
+
+def row_version(row: dict):
+    """Identity and version of a row dict; every update bumps ``version``."""
+    return row["id"], row["version"]
+
+
+def make_etag(key: str, versions: Iterable) -> str:
+    digest = hashlib.blake2b(key.encode(), digest_size=16)
+    digest.update(repr(list(versions)).encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={ETAG_HEADER: etag})
+
+
+# load() returns the response payload, the versions of the rows in it and
+# extra headers; serialize() turns the payload into JSON bytes.
+Loader = Callable[[], Awaitable[Tuple[object, Iterable, Dict[str, str]]]]
+
+
+async def cached_json_response(
+    request: Request,
+    namespaces: Sequence[str],
+    load: Loader,
+    serialize: Callable[[object], bytes],
+) -> Response:
+    key = await response_cache.key(namespaces, request)
+    if_none_match = request.headers.get("if-none-match")
+
+    # A client that just wrote reads from the primary (get_read_db), past
+    # entries a lagging replica may have filled
+    entry = None if wrote_recently(request) else await response_cache.get(key)
+    if entry is None:
+        payload, versions, headers = await load()
+        etag = make_etag(key, versions)
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+        entry = CachedResponse(etag=etag, body=serialize(payload), headers=headers)
+        # A replica may not have caught up with a recent write yet: serve
+        # what it returned, but do not keep it for everyone
+        if not (getattr(request.state, "read_replica", False)
+                and response_cache.invalidated_within(settings.REPLICA_LAG_SECONDS)):
+            await response_cache.set(key, entry)
+    elif etag_matches(if_none_match, entry.etag):
+        return _not_modified(entry.etag)
+
+    return Response(
+        content=entry.body,
+        media_type=JSONResponse.media_type,
+        headers={**entry.headers, ETAG_HEADER: entry.etag},
+    )
@@ -1,37 +1,48 @@
+"""Token authentication.
+
+Not mounted yet: this module needs python-jose and a ``User`` model with
+``UserCreate``/``TokenData`` schemas, none of which exist in the app, so it
+cannot be imported as is. The password hashing below takes effect once it
+is.
+"""
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, run_db
 from ..models import User
 from ..schemas import UserCreate, User as UserSchema, Token, TokenData
 from ..config import settings
+from ..security import get_password_hash, hash_password_async, verify_and_update_async, verify_password
 
 router = APIRouter()
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # OAuth2 password bearer for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
 def get_user(db, username: str):
     return db.query(User).filter(User.username == username).first()
 
-def authenticate_user(db, username: str, password: str):
-    user = get_user(db, username)
-    if not user or not verify_password(password, user.hashed_password):
+def _store_password_hash(db, user, hashed_password: str):
+    db_user = db.merge(user)
+    db_user.hashed_password = hashed_password
+    db.commit()
+
+async def authenticate_user(db, username: str, password: str):
+    user = await run_db(db, get_user, username)
+    if not user:
         return False
+    # bcrypt runs on the hashing pool, never on the event loop
+    valid, new_hash = await verify_and_update_async(password, user.hashed_password)
+    if not valid:
+        return False
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made: upgrade it now that
+        # the plain password is at hand
+        await run_db(db, _store_password_hash, user, new_hash)
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -63,8 +74,7 @@ async def get_current_user(db: Session = Depends(get_db), token: str = Depends(o
         raise credentials_exception
     return user
 
-@router.post("/register", response_model=UserSchema)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+def _check_registration(db, user: UserCreate):
     db_user = get_user(db, username=user.username)
     if db_user:
         raise HTTPException(
@@ -79,9 +89,8 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    
-    # Create new user
-    hashed_password = get_password_hash(user.password)
+
+def _create_user(db, user: UserCreate, hashed_password: str):
     db_user = User(
         username=user.username,
         email=user.email,
@@ -90,12 +99,21 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    return db_user
+
+@router.post("/register", response_model=UserSchema)
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+    await run_db(db, _check_registration, user)
+    
+    # Create new user
+    hashed_password = await hash_password_async(user.password)
+    db_user = await run_db(db, _create_user, user, hashed_password)
     
     return db_user
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
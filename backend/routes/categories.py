@@ -1,18 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import case, func, select, update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 
-from backend.database import get_db
-from backend.models import Category
-from backend.schemas import CategoryCreate, Category as CategorySchema
+from backend import events
+from backend.database import DBSession, get_db, get_read_db, run_db
+from backend.models import Category, Task, TaskStatus
+from backend.pagination import NEXT_CURSOR_HEADER, InvalidCursor, paginate
+from backend.response_cache import cached_json_response, response_cache, row_version
+from backend.serialization import CATEGORY_COLUMNS, category_count_dicts, category_dicts, category_rows
+from backend.schemas import CategoryCreate, CategoryUpdate, CategoryWithCounts, Category as CategorySchema
+from backend.writes import delete_returning, update_returning
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+_category_list_adapter = TypeAdapter(List[CategorySchema])
+_category_count_list_adapter = TypeAdapter(List[CategoryWithCounts])
+
+# One count per status, in TaskStatus order; count() skips the NULLs of
+# non-matching rows and of categories without tasks
+STATUS_COUNT_COLUMNS = tuple(
+    func.count(case((Task.status == task_status, Task.id))).label(f"count__{task_status.value}")
+    for task_status in TaskStatus
+)
 
 # your category route handlers...
 
+# Handlers are async and hand their ORM work to run_db, see routes/tasks.py.
 
-@router.post("/", response_model=CategorySchema)
-def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
+def _create_category(db: Session, category: CategoryCreate):
     category_data = category.model_dump(exclude={"description", "is_default"})
     db_category = Category(**category_data)
     db.add(db_category)
@@ -20,38 +38,108 @@ def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
     db.refresh(db_category)
     return db_category
 
-@router.get("/", response_model=List[CategorySchema])
-def read_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    categories = db.query(Category).offset(skip).limit(limit).all()
-    return categories
+@router.post("/", response_model=CategorySchema)
+async def create_category(category: CategoryCreate, db: DBSession = Depends(get_db)):
+    created = await run_db(db, _create_category, category)
+    await response_cache.invalidate("categories")
+    await events.publish(lambda: [events.category_event("created", created)])
+    return created
 
-@router.get("/{category_id}", response_model=CategorySchema)
-def read_category(category_id: int, db: Session = Depends(get_db)):
+def category_count_rows(db: Session):
+    """Categories with their task counts by status: one GROUP BY over the join."""
+    return (
+        db.query(*CATEGORY_COLUMNS, *STATUS_COUNT_COLUMNS)
+        .outerjoin(Task, Task.category_id == Category.id)
+        .group_by(Category.id)
+    )
+
+def _read_categories(db: Session, limit: int, skip: int, cursor: Optional[str], with_counts: bool = False):
+    query = category_count_rows(db) if with_counts else category_rows(db)
+    try:
+        rows, next_cursor = paginate(query, (Category.id,), "id", limit, skip=skip, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return (category_count_dicts(rows) if with_counts else category_dicts(rows)), next_cursor
+
+def _category_version(category: dict, with_counts: bool):
+    # Task writes change the counts without bumping the category's version
+    if with_counts:
+        return row_version(category), tuple(category["by_status"].values())
+    return row_version(category)
+
+@router.get("/", response_model=List[Union[CategoryWithCounts, CategorySchema]])
+async def read_categories(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header; replaces skip"),
+    with_counts: bool = Query(False, description="Add each category's task_count and counts by_status"),
+    db: DBSession = Depends(get_read_db)
+):
+    """List categories. Responses carry an ETag; send it back in If-None-Match to get a 304."""
+    async def load():
+        categories, next_cursor = await run_db(db, _read_categories, limit, skip, cursor, with_counts)
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return categories, [_category_version(category, with_counts) for category in categories], headers
+
+    adapter = _category_count_list_adapter if with_counts else _category_list_adapter
+    # Counts change with every task write, not only category writes
+    namespaces = ("categories", "tasks") if with_counts else ("categories",)
+    return await cached_json_response(
+        request, namespaces, load,
+        lambda categories: adapter.dump_json(adapter.validate_python(categories)),
+    )
+
+def _read_category(db: Session, category_id: int):
     category = db.query(Category).filter(Category.id == category_id).first()
     if category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
 
+@router.get("/{category_id}", response_model=CategorySchema)
+async def read_category(category_id: int, db: DBSession = Depends(get_read_db)):
+    return await run_db(db, _read_category, category_id)
+
+def _update_category(db: Session, category_id: int, category: CategoryUpdate):
+    values = category.model_dump(exclude={"description", "is_default", "version"})
+    return CategorySchema.model_validate(update_returning(db, Category, category_id, values, category.version))
+
 @router.put("/{category_id}", response_model=CategorySchema)
-def update_category(category_id: int, category: CategoryCreate, db: Session = Depends(get_db)):
-    db_category = db.query(Category).filter(Category.id == category_id).first()
-    if db_category is None:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    # Update category fields
-    for key, value in category.dict().items():
-        setattr(db_category, key, value)
-    
-    db.commit()
-    db.refresh(db_category)
-    return db_category
+async def update_category(category_id: int, category: CategoryUpdate, db: DBSession = Depends(get_db)):
+    """Update a category. Send the ``version`` you read to fail with 409 instead of overwriting a newer change."""
+    updated = await run_db(db, _update_category, category_id, category)
+    await response_cache.invalidate("categories")
+    await events.publish(lambda: [events.category_event("updated", updated)])
+    return updated
+
+def _delete_category(db: Session, category_id: int, version: Optional[int] = None, reassign_to: Optional[int] = None):
+    if reassign_to is not None:
+        if reassign_to == category_id:
+            raise HTTPException(status_code=400, detail="Cannot reassign tasks to the category being deleted")
+        if db.execute(select(Category.id).where(Category.id == reassign_to)).first() is None:
+            raise HTTPException(status_code=404, detail="Category to reassign tasks to not found")
+    # Moves or detaches all its tasks in one statement, the same cost however
+    # many there are; rolled back if the delete below finds nothing
+    db.execute(update(Task.__table__).where(Task.category_id == category_id).values(category_id=reassign_to))
+    return CategorySchema.model_validate(delete_returning(db, Category, category_id, version))
 
 @router.delete("/{category_id}")
-def delete_category(category_id: int, db: Session = Depends(get_db)):
-    db_category = db.query(Category).filter(Category.id == category_id).first()
-    if db_category is None:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    db.delete(db_category)
-    db.commit()
-    return {"detail": "Category deleted successfully"}
\ No newline at end of file
+async def delete_category(
+    category_id: int,
+    version: Optional[int] = Query(None, description="Only delete if the category is still at this version (else 409)"),
+    reassign_to: Optional[int] = Query(None, description="Move the category's tasks here instead of leaving them uncategorized"),
+    db: DBSession = Depends(get_db)
+):
+    deleted = await run_db(db, _delete_category, category_id, version, reassign_to)
+    await response_cache.invalidate("categories")
+
+    def build_events():
+        built = [events.category_event("deleted", deleted)]
+        if reassign_to is not None:
+            # Too many tasks may have moved for an event each; views of
+            # either category are told to refetch
+            built.append({"type": "task.reassigned", "category_id": reassign_to, "previous": {"category_id": category_id}})
+        return built
+
+    await events.publish(build_events)
+    return {"detail": "Category deleted successfully"}
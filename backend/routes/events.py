@@ -0,0 +1,51 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from backend import events
+from backend.config import settings
+
+router = APIRouter()
+
+
+def format_event(event: dict) -> bytes:
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n".encode()
+
+
+async def event_stream(subscription: events.Subscription):
+    """Server-Sent Events for one subscription, with comment lines as keepalive."""
+    try:
+        yield b": connected\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=settings.EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield format_event(event)
+    finally:
+        events.get_broker().unsubscribe(subscription)
+
+
+@router.get("/", response_class=StreamingResponse)
+async def stream_events(
+    status: Optional[str] = Query(None, description="Only tasks with (or leaving) this status"),
+    category_id: Optional[int] = Query(None, description="Only tasks in (or leaving) this category, and the category itself"),
+):
+    """Live stream of task and category changes as Server-Sent Events.
+
+    Event types are ``task.created``, ``task.updated``, ``task.deleted``,
+    ``task.imported`` and ``category.*``. A ``resync`` event means events
+    were dropped because the client fell behind: refetch what it displays.
+    """
+    # Subscribed before the response starts, so no write after this request
+    # is missed
+    subscription = await events.get_broker().subscribe(status, category_id)
+    return StreamingResponse(
+        event_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
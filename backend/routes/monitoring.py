@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+
+from backend import database, events
+from backend.cache import CACHES
+from backend.pool import pool_status
+
+router = APIRouter()
+
+
+@router.get("/pool")
+def read_pool_status():
+    """Live connection pool statistics for this worker process."""
+    db = database.get_database()
+    status = {"sync": pool_status(db.engine)}
+    if db.async_engine is not None:
+        status["async"] = pool_status(db.async_engine.sync_engine)
+    if db.replicas:
+        status["replicas"] = [
+            {**replica.status(), "sync": pool_status(replica.engine)} for replica in db.replicas.replicas
+        ]
+    return status
+
+
+@router.get("/caches")
+def read_cache_stats():
+    """Size and hit rate of every in-process cache in this worker."""
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+@router.get("/events")
+def read_event_stats():
+    """Change feed subscribers of this worker and events dropped for slow ones."""
+    return events.get_broker().stats()
@@ -0,0 +1,104 @@
+"""Delta sync for offline and mobile clients.
+
+``GET /api/sync`` returns the tasks and categories changed, and the ids of
+those deleted, since the watermark the client got from its previous sync.
+Each of the three streams (task rows, category rows, tombstones) is read as a
+keyset range on its ``(timestamp, id)`` index, so a sync costs what changed
+rather than the size of the dataset.
+
+A page is cut at a common timestamp across the streams: everything changed
+before the newest change returned has been returned too, so applying the
+deletions of a page before its upserts is always correct.
+"""
+from datetime import timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from backend.config import settings
+from backend.database import DBSession, get_db, run_db
+from backend.models import Category, Task, Tombstone, utcnow
+from backend.pagination import InvalidCursor, after_keys, decode_cursor, encode_cursor, order_by_keys
+from backend.schemas import SyncResult
+from backend.serialization import CATEGORY_COLUMNS, TASK_COLUMNS, TASK_KEYS, category_dicts
+from backend.tags import task_tag_names
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+_sync_adapter = TypeAdapter(SyncResult)
+
+# (columns, keyset) per stream, in watermark order. Tag changes bump the
+# task's updated_at, so tasks carry their tags
+SYNC_STREAMS = (
+    ((*TASK_COLUMNS, task_tag_names()), (Task.updated_at, Task.id)),
+    (CATEGORY_COLUMNS, (Category.updated_at, Category.id)),
+    ((Tombstone.id, Tombstone.deleted_at, Tombstone.entity, Tombstone.entity_id), (Tombstone.deleted_at, Tombstone.id)),
+)
+WATERMARK_SORT = "sync"
+
+
+def _key(row, keys):
+    return [getattr(row, key.key) for key in keys]
+
+
+def _sync(db: Session, watermark: Optional[str], limit: int):
+    try:
+        positions = decode_cursor(watermark, WATERMARK_SORT) if watermark else [None] * 6
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=f"Invalid watermark: {e}")
+    if len(positions) != 6:
+        raise HTTPException(status_code=400, detail="Invalid watermark: Malformed cursor")
+
+    cutoff = utcnow() - timedelta(seconds=settings.SYNC_LAG_SECONDS)
+    pages = []
+    for i, (columns, keys) in enumerate(SYNC_STREAMS):
+        after = positions[2 * i:2 * i + 2]
+        query = db.query(*columns).filter(keys[0] <= cutoff)
+        if after[0] is not None:
+            query = query.filter(after_keys(keys, after))
+        pages.append(query.order_by(*order_by_keys(keys)).limit(limit + 1).all())
+
+    # Streams with more than a page of changes bound the page for all of them
+    horizons = [_key(rows[limit - 1], keys)[0] for rows, (_, keys) in zip(pages, SYNC_STREAMS) if len(rows) > limit]
+    has_more = bool(horizons)
+    if horizons:
+        horizon = min(horizons)
+        pages = [
+            [row for row in rows[:limit] if _key(row, keys)[0] <= horizon]
+            for rows, (_, keys) in zip(pages, SYNC_STREAMS)
+        ]
+
+    for i, (rows, (_, keys)) in enumerate(zip(pages, SYNC_STREAMS)):
+        if rows:
+            positions[2 * i:2 * i + 2] = _key(rows[-1], keys)
+
+    task_rows, category_rows, tombstones = pages
+    deleted = {"tasks": [], "categories": []}
+    for tombstone in tombstones:
+        deleted[tombstone.entity].append(tombstone.entity_id)
+    return {
+        "tasks": [{**dict(zip(TASK_KEYS, row)), "tags": sorted(row.tags or ())} for row in task_rows],
+        "categories": category_dicts(category_rows),
+        "deleted": deleted,
+        "watermark": encode_cursor(WATERMARK_SORT, positions),
+        "has_more": has_more,
+    }
+
+
+@router.get("/", response_model=SyncResult)
+async def sync(
+    watermark: Optional[str] = Query(None, description="Watermark from the previous sync; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum changes per stream in this page"),
+    db: DBSession = Depends(get_db)
+):
+    """Tasks and categories changed, and ids deleted, since ``watermark``.
+
+    Apply ``deleted`` first, then upsert ``tasks`` and ``categories``, store
+    the new ``watermark`` and, while ``has_more`` is true, sync again.
+    Changes appear here ``SYNC_LAG_SECONDS`` after they commit.
+    """
+    result = await run_db(db, _sync, watermark, limit)
+    return Response(content=_sync_adapter.dump_json(_sync_adapter.validate_python(result)), media_type="application/json")
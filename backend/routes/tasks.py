@@ -1,73 +1,499 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import heapq
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
 from typing import List, Optional
 
-from backend.database import get_db
-from backend.models import Task
-from backend.schemas import TaskCreate, Task as TaskSchema, TaskUpdate, TaskWithCategory
+from backend.database import DBSession, get_db, get_read_db, run_db
+from backend.export import EXPORT_FORMATS, export_statement, stream_export
+from backend.importer import import_tasks as run_import
+from backend.models import Tag, Task, TaskPriority, TaskStatus, TaskTag, utcnow
+from backend.pagination import NEXT_CURSOR_HEADER, InvalidCursor, paginate
+from backend.reminders import cancel_reminders, schedule_reminders
+from backend.tags import clear_task_tags, has_all_tags, has_any_tags, set_task_tags
+from backend import events, search
+from backend.response_cache import cached_json_response, response_cache, row_version
+from backend.serialization import task_dict, task_dicts, task_rows
+from backend.writes import delete_returning, record_deletions, update_returning
+from backend.schemas import (
+    BulkItemResult,
+    BulkResult,
+    TaskBulkUpdate,
+    CategoryTaskCount,
+    ImportResult,
+    TaskCreate,
+    Task as TaskSchema,
+    TagCount,
+    TaskStats,
+    TaskUpdate,
+    TaskWithCategory,
+)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Stable sort keys usable for keyset pagination; ``id`` breaks ties so every
+# key is unique.
+TASK_SORT_KEYS = {
+    "id": (Task.id,),
+    "due_date": (Task.due_date, Task.id),
+}
+
+# Cached task responses embed the category, so they depend on both
+CACHE_NAMESPACES = ("tasks", "categories")
+
+_task_adapter = TypeAdapter(TaskWithCategory)
+_task_list_adapter = TypeAdapter(List[TaskWithCategory])
+
+def task_version(task: dict):
+    return row_version(task), task["category"] and row_version(task["category"])
+
+def filter_tasks(
+    query,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    category_id: Optional[int] = None,
+    tags: Optional[List[str]] = None,
+    any_tags: Optional[List[str]] = None,
+):
+    """Apply the list filters shared by every task listing endpoint.
+
+    ``tags`` keeps tasks carrying all of the given tags, ``any_tags`` tasks
+    carrying at least one.
+    """
+    if status:
+        query = query.filter(Task.status == status)
+    if priority:
+        query = query.filter(Task.priority == priority)
+    if category_id:
+        query = query.filter(Task.category_id == category_id)
+    if tags:
+        query = query.filter(has_all_tags(tags))
+    if any_tags:
+        query = query.filter(has_any_tags(any_tags))
+    return query
 
 # your task route handlers...
 
+# Handlers are async and hand their ORM work to run_db, which runs it on the
+# event loop through the async driver or in the threadpool for the sync one.
 
-@router.post("/", response_model=TaskSchema)
-def create_task(task: TaskCreate, db: Session = Depends(get_db)):
-    task_data = task.model_dump(exclude={"tags", "reminder"})
+def _create_task(db: Session, task: TaskCreate):
+    task_data = task.model_dump(exclude={"tags"})
     db_task = Task(**task_data)
     db.add(db_task)
+    if db_task.reminder is not None or task.tags:
+        db.flush()
+        if db_task.reminder is not None:
+            schedule_reminders(db, [db_task.id])
+        if task.tags:
+            set_task_tags(db, {db_task.id: task.tags})
     db.commit()
     db.refresh(db_task)
     return db_task
 
+@router.post("/", response_model=TaskSchema)
+async def create_task(task: TaskCreate, db: DBSession = Depends(get_db)):
+    created = await run_db(db, _create_task, task)
+    await response_cache.invalidate("tasks")
+    await events.publish(lambda: [events.task_event("created", created)])
+    return created
+
+# Bulk operations run in a single transaction and report a status per item.
+# Declared before the /{task_id} routes so that "bulk" is not parsed as a
+# task id.
+
+def _insert_tasks(db: Session, tasks: List[TaskCreate]) -> List[Task]:
+    # One multi-row INSERT ... RETURNING instead of a commit and refresh per task
+    rows = [task.model_dump(exclude={"tags"}) for task in tasks]
+    created = db.scalars(insert(Task).returning(Task, sort_by_parameter_order=True), rows).all()
+    schedule_reminders(db, [task.id for task in created if task.reminder is not None])
+    set_task_tags(db, {row.id: task.tags for row, task in zip(created, tasks) if task.tags})
+    return created
+
+def _created(i: int, task: Task) -> BulkItemResult:
+    return BulkItemResult(index=i, id=task.id, status=status.HTTP_201_CREATED, task=task)
+
+def _bulk_create_tasks(db: Session, tasks: List[TaskCreate]):
+    results = []
+    if not tasks:
+        return BulkResult(results=results)
+    try:
+        results = [_created(i, task) for i, task in enumerate(_insert_tasks(db, tasks))]
+        db.commit()
+        return BulkResult(results=results)
+    except IntegrityError:
+        db.rollback()
+
+    # Some item violates a constraint (e.g. an unknown category_id): insert
+    # each in a SAVEPOINT and report the ones that fail
+    for i, task in enumerate(tasks):
+        try:
+            with db.begin_nested():
+                (created,) = _insert_tasks(db, [task])
+            results.append(_created(i, created))
+        except IntegrityError as e:
+            results.append(BulkItemResult(
+                index=i, status=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e.orig).strip(),
+            ))
+    db.commit()
+    return BulkResult(results=results)
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_tasks(tasks: List[TaskCreate], db: DBSession = Depends(get_db)):
+    result = await run_db(db, _bulk_create_tasks, tasks)
+    await response_cache.invalidate("tasks")
+    await events.publish(lambda: [events.task_event("created", item.task) for item in result.results if item.task is not None])
+    return result
+
+def _bulk_update_tasks(db: Session, updates: List[TaskBulkUpdate]):
+    ids = {item.id for item in updates}
+    # Status and category before the update, for change events, and the
+    # version for items that expect one; locked until commit
+    previous, versions = {}, {}
+    if ids:
+        rows = db.execute(
+            select(Task.id, Task.status, Task.category_id, Task.version).where(Task.id.in_(ids)).with_for_update()
+        )
+        for task_id, task_status, category_id, version in rows:
+            previous[task_id] = {"status": task_status, "category_id": category_id}
+            versions[task_id] = version
+    conflicts = {item.id for item in updates if item.id in versions and item.version not in (None, versions[item.id])}
+
+    params, new_tags = [], {}
+    for item in updates:
+        values = item.model_dump(exclude_unset=True, exclude={"id", "tags", "version"})
+        if item.id in versions and item.id not in conflicts:
+            if "tags" in item.model_fields_set:
+                new_tags[item.id] = item.tags or []
+                # A tag change is a change of the task: bump its version
+                values.setdefault("updated_at", utcnow())
+            if values:
+                params.append({"id": item.id, **values})
+    if params:
+        # ORM bulk UPDATE by primary key: executemany, grouped by the set of
+        # columns each item changes
+        db.execute(update(Task), params)
+        schedule_reminders(db, [values["id"] for values in params if "reminder" in values])
+        set_task_tags(db, new_tags)
+    db.commit()
+
+    updated = set(versions) - conflicts
+    tasks = {}
+    if updated:
+        tasks = {task.id: task for task in db.scalars(select(Task).where(Task.id.in_(updated)))}
+
+    def result(i, item):
+        if item.id in tasks:
+            return BulkItemResult(index=i, id=item.id, status=status.HTTP_200_OK, task=tasks[item.id])
+        if item.id in conflicts:
+            return BulkItemResult(
+                index=i, id=item.id, status=status.HTTP_409_CONFLICT,
+                detail=f"Task was modified by another request (now version {versions[item.id]})",
+            )
+        return BulkItemResult(index=i, id=item.id, status=status.HTTP_404_NOT_FOUND, detail="Task not found")
+
+    return BulkResult(results=[result(i, item) for i, item in enumerate(updates)]), previous
+
+@router.patch("/bulk", response_model=BulkResult)
+async def bulk_update_tasks(updates: List[TaskBulkUpdate], db: DBSession = Depends(get_db)):
+    result, previous = await run_db(db, _bulk_update_tasks, updates)
+    await response_cache.invalidate("tasks")
+    await events.publish(lambda: [
+        events.task_event("updated", item.task, previous[item.id]) for item in result.results if item.task is not None
+    ])
+    return result
+
+def _delete_task_links(db: Session, task_ids):
+    # Foreign keys cascade on PostgreSQL; SQLite does not enforce them and
+    # may hand a deleted task's id to the next task, so clear links by hand
+    if db.get_bind().dialect.name != "sqlite":
+        return
+    clear_task_tags(db, task_ids)
+    cancel_reminders(db, task_ids)
+
+def _bulk_delete_tasks(db: Session, ids: List[int]):
+    deleted = {}
+    if ids:
+        statement = delete(Task).where(Task.id.in_(set(ids))).returning(Task)
+        # Snapshots for change events; the rows are gone after commit
+        deleted = {task.id: TaskSchema.model_validate(task) for task in db.scalars(statement)}
+        record_deletions(db, Task, deleted)
+        _delete_task_links(db, deleted)
+        db.commit()
+    return deleted, BulkResult(results=[
+        BulkItemResult(index=i, id=task_id, status=status.HTTP_204_NO_CONTENT)
+        if task_id in deleted else
+        BulkItemResult(index=i, id=task_id, status=status.HTTP_404_NOT_FOUND, detail="Task not found")
+        for i, task_id in enumerate(ids)
+    ])
+
+@router.delete("/bulk", response_model=BulkResult)
+async def bulk_delete_tasks(ids: List[int] = Body(...), db: DBSession = Depends(get_db)):
+    deleted, result = await run_db(db, _bulk_delete_tasks, ids)
+    await response_cache.invalidate("tasks")
+    await events.publish(lambda: [events.task_event("deleted", task) for task in deleted.values()])
+    return result
+
+def _task_stats(db: Session, filters: dict, due_soon_hours: int):
+    now = datetime.now(timezone.utc)
+    open_task = Task.status != TaskStatus.COMPLETED
+    overdue = case((open_task & (Task.due_date < now), 1), else_=0)
+    due_soon = case(
+        (open_task & (Task.due_date >= now) & (Task.due_date < now + timedelta(hours=due_soon_hours)), 1),
+        else_=0,
+    )
+    # One GROUP BY over the finest grouping; the per-dimension totals are
+    # folded from its (few) rows instead of issuing a query per dimension.
+    query = (
+        db.query(
+            Task.status,
+            Task.priority,
+            Task.category_id,
+            func.count(Task.id),
+            func.sum(overdue),
+            func.sum(due_soon),
+        )
+        .group_by(Task.status, Task.priority, Task.category_id)
+    )
+    query = filter_tasks(query, **filters)
+
+    stats = {
+        "total": 0,
+        "overdue": 0,
+        "due_soon": 0,
+        "by_status": dict.fromkeys(TaskStatus, 0),
+        "by_priority": dict.fromkeys(TaskPriority, 0),
+    }
+    by_category = {}
+    for task_status, priority, category_id, count, overdue_count, due_soon_count in query:
+        stats["total"] += count
+        stats["overdue"] += overdue_count or 0
+        stats["due_soon"] += due_soon_count or 0
+        if task_status is not None:
+            stats["by_status"][task_status] += count
+        if priority is not None:
+            stats["by_priority"][priority] += count
+        by_category[category_id] = by_category.get(category_id, 0) + count
+    stats["by_category"] = [
+        CategoryTaskCount(category_id=category_id, count=count)
+        for category_id, count in sorted(by_category.items(), key=lambda item: (item[0] is None, item[0] or 0))
+    ]
+    return TaskStats(**stats)
+
+@router.get("/stats", response_model=TaskStats)
+async def read_task_stats(
+    status: Optional[str] = Query(None),
+    priority: Optional[str] = Query(None),
+    category_id: Optional[int] = Query(None),
+    due_soon_hours: int = Query(24, ge=1, description="Window for the due_soon count"),
+    tags: Optional[List[str]] = Query(None, description="Only tasks with all of these tags (repeat the parameter)"),
+    any_tags: Optional[List[str]] = Query(None, description="Only tasks with at least one of these tags"),
+    db: DBSession = Depends(get_read_db)
+):
+    filters = {"status": status, "priority": priority, "category_id": category_id, "tags": tags, "any_tags": any_tags}
+    return await run_db(db, _task_stats, filters, due_soon_hours)
+
+def _tag_counts(db: Session, filters: dict, limit: int):
+    count = func.count(TaskTag.task_id)
+    query = db.query(Tag.name, count).select_from(TaskTag).join(Tag, Tag.id == TaskTag.tag_id)
+    if any(filters.values()):
+        # Only the filters need the tasks; without them task_tags alone is counted
+        query = filter_tasks(query.join(Task, Task.id == TaskTag.task_id), **filters)
+    query = query.group_by(Tag.id, Tag.name).order_by(count.desc(), Tag.name)
+    return [TagCount(name=name, count=n) for name, n in query.limit(limit)]
+
+@router.get("/tags", response_model=List[TagCount])
+async def read_tag_counts(
+    status: Optional[str] = Query(None),
+    priority: Optional[str] = Query(None),
+    category_id: Optional[int] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    tags: Optional[List[str]] = Query(None, description="Only tasks with all of these tags (repeat the parameter)"),
+    any_tags: Optional[List[str]] = Query(None, description="Only tasks with at least one of these tags"),
+    db: DBSession = Depends(get_read_db)
+):
+    """Tags with the number of matching tasks carrying each, most used first."""
+    filters = {"status": status, "priority": priority, "category_id": category_id, "tags": tags, "any_tags": any_tags}
+    return await run_db(db, _tag_counts, filters, limit)
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_tasks(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = Query(None),
+    priority: Optional[str] = Query(None),
+    category_id: Optional[int] = Query(None),
+    tags: Optional[List[str]] = Query(None, description="Only tasks with all of these tags (repeat the parameter)"),
+    any_tags: Optional[List[str]] = Query(None, description="Only tasks with at least one of these tags"),
+    db: DBSession = Depends(get_read_db)
+):
+    """Stream every matching task with its category and tags as NDJSON or CSV."""
+    statement = filter_tasks(export_statement(), status, priority, category_id, tags, any_tags)
+    return StreamingResponse(
+        stream_export(db, statement, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{export_format}"'},
+    )
+
+@router.post("/import", response_model=ImportResult)
+async def import_tasks(
+    request: Request,
+    import_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    db: DBSession = Depends(get_db)
+):
+    """Create tasks from a CSV (with header row) or NDJSON request body.
+
+    The body is processed as it streams in; rows that fail validation or
+    violate a constraint are reported in ``errors`` and the rest are kept.
+    """
+    try:
+        result = await run_import(db, request.stream(), import_format)
+    finally:
+        # Chunks are committed as they go, so even a failed import changed rows
+        await response_cache.invalidate("tasks")
+    # Too many rows for an event each: subscribers are told to refetch
+    await events.publish(lambda: [{"type": "task.imported", "inserted": result.inserted}])
+    return result
+
+# Matches loaded per query by the in-memory search fallback
+SEARCH_CHUNK_SIZE = 500
+
+def _search_tasks(db: Session, filters: dict, q: str, limit: int, skip: int):
+    """Tasks matching ``q`` and the filters, best match first."""
+    if search.full_text_supported(db):
+        tsquery = search.ts_query(q)
+        query = (
+            filter_tasks(task_rows(db), **filters)
+            .filter(search.matches(tsquery))
+            .order_by(search.rank(tsquery).desc(), Task.id)
+        )
+        return task_dicts(query.offset(skip).limit(limit))
+
+    # In-memory index: walk the ranked matches and load them in chunks,
+    # applying the filters in SQL, until the page is full
+    scores = search.task_index.search(db, q)
+    wanted = skip + limit
+    rank = lambda task_id: (-scores[task_id], task_id)
+    if any(filters.values()):
+        ranked = sorted(scores, key=rank)
+    else:
+        ranked = heapq.nsmallest(wanted, scores, key=rank)
+    page = []
+    for start in range(0, len(ranked), SEARCH_CHUNK_SIZE):
+        chunk = ranked[start:start + SEARCH_CHUNK_SIZE]
+        query = filter_tasks(task_rows(db).filter(Task.id.in_(chunk)), **filters)
+        found = {row.id: row for row in query}
+        page.extend(found[task_id] for task_id in chunk if task_id in found)
+        if len(page) >= wanted:
+            break
+    return task_dicts(page[skip:wanted])
+
+def _read_tasks(db: Session, filters: dict, sort: str, limit: int, skip: int, cursor: Optional[str], q: Optional[str] = None):
+    if q:
+        if cursor:
+            raise HTTPException(status_code=400, detail="Search results are paged with skip, not cursor")
+        return _search_tasks(db, filters, q, limit, skip), None
+    query = filter_tasks(task_rows(db), **filters)
+    try:
+        rows, next_cursor = paginate(query, TASK_SORT_KEYS[sort], sort, limit, skip=skip, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return task_dicts(rows), next_cursor
+
 @router.get("/", response_model=List[TaskWithCategory])
-def read_tasks(
-    skip: int = 0,
-    limit: int = 100,
+async def read_tasks(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     status: Optional[str] = Query(None),
     priority: Optional[str] = Query(None),
     category_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header; replaces skip"),
+    sort: str = Query("id", pattern="^(id|due_date)$"),
+    q: Optional[str] = Query(None, description="Full-text search in title and description; results are ranked by relevance"),
+    tags: Optional[List[str]] = Query(None, description="Only tasks with all of these tags (repeat the parameter)"),
+    any_tags: Optional[List[str]] = Query(None, description="Only tasks with at least one of these tags"),
+    db: DBSession = Depends(get_read_db)
 ):
-    query = db.query(Task)
-    
-    if status:
-        query = query.filter(Task.status == status)
-    if priority:
-        query = query.filter(Task.priority == priority)
-    if category_id:
-        query = query.filter(Task.category_id == category_id)
-    
-    tasks = query.offset(skip).limit(limit).all()
-    return tasks
+    """List tasks. Responses carry an ETag; send it back in If-None-Match to get a 304."""
+    filters = {"status": status, "priority": priority, "category_id": category_id, "tags": tags, "any_tags": any_tags}
 
-@router.get("/{task_id}", response_model=TaskWithCategory)
-def read_task(task_id: int, db: Session = Depends(get_db)):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if task is None:
+    async def load():
+        tasks, next_cursor = await run_db(db, _read_tasks, filters, sort, limit, skip, cursor, q)
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return tasks, [task_version(task) for task in tasks], headers
+
+    return await cached_json_response(
+        request, CACHE_NAMESPACES, load,
+        lambda tasks: _task_list_adapter.dump_json(_task_list_adapter.validate_python(tasks)),
+    )
+
+def _read_task(db: Session, task_id: int):
+    row = task_rows(db).filter(Task.id == task_id).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    return task_dict(row)
+
+@router.get("/{task_id}", response_model=TaskWithCategory)
+async def read_task(request: Request, task_id: int, db: DBSession = Depends(get_read_db)):
+    async def load():
+        task = await run_db(db, _read_task, task_id)
+        return task, [task_version(task)], {}
+
+    return await cached_json_response(
+        request, CACHE_NAMESPACES, load,
+        lambda task: _task_adapter.dump_json(_task_adapter.validate_python(task)),
+    )
+
+def _update_task(db: Session, task_id: int, task_update: TaskUpdate, with_previous: bool = False):
+    values = task_update.model_dump(exclude_unset=True, exclude={"tags", "version"})
+    set_tags = "tags" in task_update.model_fields_set
+    if set_tags:
+        # A tag change is a change of the task: bump its version
+        values.setdefault("updated_at", utcnow())
+    previous = None
+    if with_previous and values.keys() & {"status", "category_id"}:
+        # Only change events need the old values; locked so they stay the old ones
+        row = db.execute(
+            select(Task.status, Task.category_id).where(Task.id == task_id).with_for_update()
+        ).one_or_none()
+        previous = row._asdict() if row else None
+    if "reminder" in values or set_tags:
+        # Queue the new reminder and replace the tags in the same transaction
+        row = update_returning(db, Task, task_id, values, task_update.version, commit=False)
+        if "reminder" in values:
+            schedule_reminders(db, [task_id])
+        if set_tags:
+            set_task_tags(db, {task_id: task_update.tags or []})
+        db.commit()
+    else:
+        row = update_returning(db, Task, task_id, values, task_update.version)
+    return TaskSchema.model_validate(row), previous
 
 @router.put("/{task_id}", response_model=TaskSchema)
-def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get_db)):
-    db_task = db.query(Task).filter(Task.id == task_id).first()
-    if db_task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    update_data = task_update.model_dump(exclude_unset=True, exclude={"tags", "reminder"})
-    for key, value in update_data.items():
-        setattr(db_task, key, value)
-    
+async def update_task(task_id: int, task_update: TaskUpdate, db: DBSession = Depends(get_db)):
+    """Update a task. Send the ``version`` you read to fail with 409 instead of overwriting a newer change."""
+    task, previous = await run_db(db, _update_task, task_id, task_update, events.get_broker().active)
+    await response_cache.invalidate("tasks")
+    await events.publish(lambda: [events.task_event("updated", task, previous)])
+    return task
+
+def _delete_task(db: Session, task_id: int, version: Optional[int] = None):
+    row = delete_returning(db, Task, task_id, version, commit=False)
+    _delete_task_links(db, [task_id])
     db.commit()
-    db.refresh(db_task)
-    return db_task
+    return TaskSchema.model_validate(row)
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(task_id: int, db: Session = Depends(get_db)):
-    db_task = db.query(Task).filter(Task.id == task_id).first()
-    if db_task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    db.delete(db_task)
-    db.commit()
+async def delete_task(
+    task_id: int,
+    version: Optional[int] = Query(None, description="Only delete if the task is still at this version (else 409)"),
+    db: DBSession = Depends(get_db)
+):
+    deleted = await run_db(db, _delete_task, task_id, version)
+    await response_cache.invalidate("tasks")
+    await events.publish(lambda: [events.task_event("deleted", deleted)])
     return None
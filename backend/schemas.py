@@ -1,6 +1,6 @@
-from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, constr
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, constr, field_validator
 
 from .models import TaskStatus, TaskPriority
 
@@ -13,26 +13,49 @@ class CategoryCreate(CategoryBase):
     description: Optional[str] = None
     is_default: bool = False
 
+class CategoryUpdate(CategoryCreate):
+    # Version the client last read; a newer version on the server is a 409
+    version: Optional[int] = None
+
 class Category(CategoryBase):
     id: int
     created_at: datetime
+    version: int = 1
 
     class Config:
         orm_mode = True
         from_attributes = True  # Added for Pydantic v2
 
+class CategoryWithCounts(Category):
+    task_count: int
+    by_status: Dict[TaskStatus, int]
+
 # Task schemas
+def utc_datetime(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert to UTC; naive values are taken to be UTC already.
+
+    Reminders are compared with the current time in SQL, and SQLite stores
+    datetimes without their offset.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc)
+
 class TaskBase(BaseModel):
     title: constr(min_length=1, max_length=255)
     description: Optional[str] = None
     status: TaskStatus = TaskStatus.PENDING
     priority: TaskPriority = TaskPriority.MEDIUM
     due_date: Optional[datetime] = None
+    reminder: Optional[datetime] = None
     category_id: Optional[int] = None
 
+    _reminder_utc = field_validator("reminder")(utc_datetime)
+
+TagName = constr(strip_whitespace=True, min_length=1, max_length=50)
+
 class TaskCreate(TaskBase):
-    tags: Optional[list[str]] = None
-    reminder: Optional[datetime] = None
+    tags: Optional[list[TagName]] = None
 
 class TaskUpdate(BaseModel):
     title: Optional[constr(min_length=1, max_length=255)] = None
@@ -41,17 +64,84 @@ class TaskUpdate(BaseModel):
     priority: Optional[TaskPriority] = None
     due_date: Optional[datetime] = None
     category_id: Optional[int] = None
-    tags: Optional[list[str]] = None
+    # Replaces the task's tags; null or [] removes them
+    tags: Optional[list[TagName]] = None
     reminder: Optional[datetime] = None
+    # Version the client last read; a newer version on the server is a 409
+    version: Optional[int] = None
+
+    _reminder_utc = field_validator("reminder")(utc_datetime)
 
 class Task(TaskBase):
     id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: int = 1
     
     class Config:
         orm_mode = True
         from_attributes = True  # Added for Pydantic v2
 
-class TaskWithCategory(Task):
-    category: Optional[Category] = None
\ No newline at end of file
+class TaskWithTags(Task):
+    tags: List[str] = []
+
+class TaskWithCategory(TaskWithTags):
+    category: Optional[Category] = None
+
+class TagCount(BaseModel):
+    name: str
+    count: int
+
+# Bulk operation schemas
+class TaskBulkUpdate(TaskUpdate):
+    id: int
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: int  # per-item HTTP status: 201 created, 200 updated, 204 deleted, 404 missing, 409 conflict, 422 invalid
+    detail: Optional[str] = None
+    task: Optional[Task] = None
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
+
+
+# Aggregate schemas
+class CategoryTaskCount(BaseModel):
+    category_id: Optional[int] = None
+    count: int
+
+class TaskStats(BaseModel):
+    total: int
+    overdue: int  # past due_date and not completed
+    due_soon: int  # due within the requested window and not completed
+    by_status: Dict[TaskStatus, int]
+    by_priority: Dict[TaskPriority, int]
+    by_category: List[CategoryTaskCount]
+
+
+# Delta sync schemas
+class SyncDeleted(BaseModel):
+    tasks: List[int]
+    categories: List[int]
+
+class SyncResult(BaseModel):
+    tasks: List[TaskWithTags]
+    categories: List[Category]
+    deleted: SyncDeleted
+    watermark: str  # pass back as ?watermark= to get the next changes
+    has_more: bool  # more changes are waiting: sync again right away
+
+
+# Import schemas
+class ImportRowError(BaseModel):
+    row: int  # 1-based data row, header and blank lines excluded
+    errors: List[Dict[str, Any]]
+
+class ImportResult(BaseModel):
+    processed: int
+    inserted: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False  # more rows failed than are listed
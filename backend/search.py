@@ -0,0 +1,130 @@
+"""Full-text search over task titles and descriptions.
+
+On PostgreSQL, ``q`` is parsed with ``websearch_to_tsquery`` (quoted phrases,
+``or``, ``-word``), matched against the GIN-indexed ``TASK_SEARCH_DOCUMENT``
+and ranked with ``ts_rank``.
+
+Other databases (SQLite in tests and local development) use an in-memory
+inverted index of the same documents, with every term required and tf-idf
+ranking. It is rebuilt on the first search after a session commits a change
+to tasks, so it is meant for small datasets only.
+"""
+import math
+import re
+import threading
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, literal_column, select
+from sqlalchemy.orm import Session
+
+from backend.models import TASK_SEARCH_DOCUMENT, Task
+
+_TOKEN = re.compile(r"\w+")
+
+
+def full_text_supported(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def ts_query(q: str):
+    return func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)
+
+
+def matches(tsquery):
+    return TASK_SEARCH_DOCUMENT.op("@@")(tsquery)
+
+
+def rank(tsquery):
+    return func.ts_rank(TASK_SEARCH_DOCUMENT, tsquery)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """Token -> {document id: term frequency}, searched with every term required."""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: Dict[int, int] = {}
+
+    def add(self, doc_id: int, text: str):
+        tokens = tokenize(text)
+        self._lengths[doc_id] = len(tokens)
+        for token, count in Counter(tokens).items():
+            self._postings.setdefault(token, {})[doc_id] = count
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def search(self, q: str) -> Dict[int, float]:
+        """Score of every document containing all terms of ``q``."""
+        terms = set(tokenize(q))
+        postings = [self._postings.get(term, {}) for term in terms]
+        if not postings or not all(postings):
+            return {}
+        postings.sort(key=len)
+        doc_ids = set(postings[0]).intersection(*postings[1:])
+        total = len(self._lengths)
+        scores = {}
+        for doc_id in doc_ids:
+            score = sum(p[doc_id] * math.log(1 + total / len(p)) for p in postings)
+            scores[doc_id] = score / math.sqrt(self._lengths[doc_id] or 1)
+        return scores
+
+
+class TaskSearchIndex:
+    """InvertedIndex of all tasks, rebuilt lazily once a commit has changed them."""
+
+    def __init__(self):
+        self._index = InvertedIndex()
+        self._stale = True
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._stale = True
+
+    def search(self, db: Session, q: str) -> Dict[int, float]:
+        with self._lock:
+            if self._stale:
+                # Cleared first: a commit landing during the rebuild marks it
+                # stale again instead of being lost
+                self._stale = False
+                self._index = self._build(db.execute(select(Task.id, Task.title, Task.description)))
+            return self._index.search(q)
+
+    @staticmethod
+    def _build(rows: Iterable[Tuple[int, Optional[str], Optional[str]]]) -> InvertedIndex:
+        index = InvertedIndex()
+        for task_id, title, description in rows:
+            index.add(task_id, f"{title or ''} {description or ''}")
+        return index
+
+
+task_index = TaskSearchIndex()
+
+
+# Any session that writes tasks, through the unit of work or an
+# INSERT/UPDATE/DELETE statement, invalidates the index when it commits.
+
+@event.listens_for(Session, "after_flush")
+def _note_flushed_tasks(session, flush_context):
+    if any(isinstance(obj, Task) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info["tasks_changed"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_task_statements(orm_execute_state):
+    # ORM-enabled statements and Core ones on the tasks table alike
+    table = getattr(orm_execute_state.statement, "table", None)
+    if not orm_execute_state.is_select and getattr(table, "name", None) == Task.__tablename__:
+        orm_execute_state.session.info["tasks_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_task_index(session):
+    if session.info.pop("tasks_changed", False):
+        task_index.invalidate()
@@ -0,0 +1,61 @@
+"""Password hashing.
+
+bcrypt is deliberately slow, so the async helpers run it on a dedicated,
+bounded thread pool (bcrypt releases the GIL while hashing) instead of on the
+event loop or in the Starlette threadpool that serves requests.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from backend.config import settings
+
+
+def make_password_context(rounds: int) -> CryptContext:
+    # Pinning min and max to the configured cost makes needs_update() flag
+    # every hash made with another cost, so logins rehash transparently.
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+# Built from Settings on first use rather than at import, like get_settings()
+@lru_cache
+def get_password_context() -> CryptContext:
+    return make_password_context(settings.BCRYPT_ROUNDS)
+
+
+@lru_cache
+def get_hash_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+def verify_password(plain_password, hashed_password, context: Optional[CryptContext] = None):
+    return (context or get_password_context()).verify(plain_password, hashed_password)
+
+
+def get_password_hash(password, context: Optional[CryptContext] = None):
+    return (context or get_password_context()).hash(password)
+
+
+async def _run_in_hash_executor(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(get_hash_executor(), fn, *args)
+
+
+async def hash_password_async(password: str, context: Optional[CryptContext] = None) -> str:
+    return await _run_in_hash_executor((context or get_password_context()).hash, password)
+
+
+async def verify_and_update_async(
+    plain_password: str, hashed_password: str, context: Optional[CryptContext] = None
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password; on success also return a new hash if the stored one uses an outdated cost."""
+    context = context or get_password_context()
+    return await _run_in_hash_executor(context.verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,70 @@
+"""Fast path from SQL rows to JSON for read endpoints.
+
+Reads select plain columns instead of ORM entities, which skips identity-map
+and relationship bookkeeping, and turn each row tuple into a dict by zipping
+it with precomputed keys. A whole page is then validated in one
+``TypeAdapter`` call, from dicts rather than attribute access, and encoded
+by pydantic-core straight to JSON bytes.
+
+Responses that are not cached go through ``ORJSONResponse``, the default
+response class of the task and category routers.
+"""
+from typing import List, Sequence
+
+from sqlalchemy.orm import Session
+
+from backend.models import Category, Task, TaskStatus
+from backend.tags import task_tag_names
+
+TASK_COLUMNS = tuple(Task.__table__.c)
+TASK_KEYS = tuple(column.key for column in TASK_COLUMNS)
+
+CATEGORY_COLUMNS = tuple(Category.__table__.c)
+CATEGORY_KEYS = tuple(column.key for column in CATEGORY_COLUMNS)
+# Prefixed so they cannot clash with task columns (tasks.category_id)
+JOINED_CATEGORY_COLUMNS = tuple(column.label(f"category__{column.key}") for column in CATEGORY_COLUMNS)
+
+_TASK_WIDTH = len(TASK_COLUMNS)
+_CATEGORY_END = _TASK_WIDTH + len(CATEGORY_COLUMNS)
+
+
+def task_rows(db: Session):
+    """Query of tasks with their category joined and their tag names, as flat column tuples."""
+    return (
+        db.query(*TASK_COLUMNS, *JOINED_CATEGORY_COLUMNS, task_tag_names())
+        .outerjoin(Category, Task.category_id == Category.id)
+    )
+
+
+def category_rows(db: Session):
+    return db.query(*CATEGORY_COLUMNS)
+
+
+def task_dict(row: Sequence) -> dict:
+    """A ``task_rows`` row as a TaskWithCategory-shaped dict."""
+    task = dict(zip(TASK_KEYS, row[:_TASK_WIDTH]))
+    category = row[_TASK_WIDTH:_CATEGORY_END]
+    # The category's primary key is NULL exactly when the outer join found none
+    task["category"] = dict(zip(CATEGORY_KEYS, category)) if category[0] is not None else None
+    task["tags"] = sorted(row[_CATEGORY_END] or ())
+    return task
+
+
+def task_dicts(rows) -> List[dict]:
+    return [task_dict(row) for row in rows]
+
+
+def category_dicts(rows) -> List[dict]:
+    return [dict(zip(CATEGORY_KEYS, row)) for row in rows]
+
+
+def category_count_dicts(rows) -> List[dict]:
+    """Rows of category columns followed by one task count per TaskStatus."""
+    width = len(CATEGORY_KEYS)
+    categories = []
+    for row in rows:
+        category = dict(zip(CATEGORY_KEYS, row[:width]))
+        category["by_status"] = dict(zip(TaskStatus, row[width:]))
+        category["task_count"] = sum(row[width:])
+        categories.append(category)
+    return categories
@@ -0,0 +1,101 @@
+"""Task tags, stored normalized: one ``tags`` row per name and one
+``task_tags`` row per tag on a task.
+
+Tag filters select task ids from the ``(tag_id, task_id)`` primary key of
+``task_tags`` and hand them to the rest of the query as ``tasks.id IN (...)``,
+so their cost follows the number of tasks carrying the tags, not the number
+of tasks. Reads get each task's tags with one correlated aggregate over
+``ix_task_tags_task_id``, in the same statement as the task.
+"""
+from typing import Dict, Iterable, List
+
+from sqlalchemy import JSON, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+
+from backend.models import Tag, Task, TaskTag
+
+tags = Tag.__table__
+task_tags = TaskTag.__table__
+
+# INSERT ... ON CONFLICT DO NOTHING, so that concurrent writers can add the
+# same new tag
+_INSERT_IGNORE = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class json_array_agg(FunctionElement):
+    """Aggregate values into a JSON array (NULL over no rows on PostgreSQL)."""
+    type = JSON()
+    name = "json_array_agg"
+    inherit_cache = True
+
+
+@compiles(json_array_agg)
+def _json_agg(element, compiler, **kw):
+    return f"json_agg({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(json_array_agg, "sqlite")
+def _json_group_array(element, compiler, **kw):
+    return f"json_group_array({compiler.process(element.clauses, **kw)})"
+
+
+def task_tag_names():
+    """Column with the tag names of the enclosing query's task, as a list (or None)."""
+    return (
+        select(json_array_agg(tags.c.name))
+        .select_from(task_tags.join(tags, tags.c.id == task_tags.c.tag_id))
+        .where(task_tags.c.task_id == Task.id)
+        .scalar_subquery()
+        .label("tags")
+    )
+
+
+def _tag_ids(db: Session, names: List[str]) -> Dict[str, int]:
+    """Ids of ``names``, creating the tags that do not exist yet."""
+    if not names:
+        return {}
+    insert_ignore = _INSERT_IGNORE[db.get_bind().dialect.name]
+    db.execute(insert_ignore(tags).on_conflict_do_nothing(index_elements=["name"]), [{"name": name} for name in names])
+    return dict(db.execute(select(tags.c.name, tags.c.id).where(tags.c.name.in_(names))).all())
+
+
+def clear_task_tags(db: Session, task_ids: Iterable[int]):
+    task_ids = list(task_ids)
+    if task_ids:
+        db.execute(delete(task_tags).where(task_tags.c.task_id.in_(task_ids)))
+
+
+def set_task_tags(db: Session, tags_by_task: Dict[int, Iterable[str]]):
+    """Replace the tags of each task; the caller commits."""
+    tags_by_task = {task_id: list(dict.fromkeys(names)) for task_id, names in tags_by_task.items()}
+    clear_task_tags(db, tags_by_task)
+    ids = _tag_ids(db, sorted({name for names in tags_by_task.values() for name in names}))
+    rows = [
+        {"task_id": task_id, "tag_id": ids[name]}
+        for task_id, names in tags_by_task.items()
+        for name in names
+    ]
+    if rows:
+        db.execute(insert(task_tags), rows)
+
+
+def _tagged(names: Iterable[str]):
+    return (
+        select(task_tags.c.task_id)
+        .join(tags, tags.c.id == task_tags.c.tag_id)
+        .where(tags.c.name.in_(set(names)))
+    )
+
+
+def has_all_tags(names: Iterable[str]):
+    """Filter for tasks carrying every one of ``names``."""
+    names = set(names)
+    return Task.id.in_(_tagged(names).group_by(task_tags.c.task_id).having(func.count() == len(names)))
+
+
+def has_any_tags(names: Iterable[str]):
+    """Filter for tasks carrying at least one of ``names``."""
+    return Task.id.in_(_tagged(names))
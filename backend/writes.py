@@ -0,0 +1,85 @@
+"""Single-statement writes with optimistic concurrency.
+
+Updates and deletes of one row are issued as one UPDATE/DELETE ... RETURNING
+instead of SELECT, flush and refresh. When the caller passes the version it
+last read, the statement only matches that version: a row changed in the
+meantime is reported as 409 rather than silently overwritten. Telling a
+missing row (404) from a conflict costs a second query, on failure only.
+
+Every delete also records a tombstone in the same transaction, for delta
+sync.
+"""
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from backend.models import Tombstone
+
+
+def _conditions(table, row_id: int, expected_version: Optional[int]):
+    conditions = [table.c.id == row_id]
+    if expected_version is not None:
+        conditions.append(table.c.version == expected_version)
+    return conditions
+
+
+def _raise_missing_or_conflict(db: Session, model, row_id: int):
+    table = model.__table__
+    current = db.execute(select(table.c.version).where(table.c.id == row_id)).scalar()
+    db.rollback()
+    if current is None:
+        raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+    raise HTTPException(
+        status_code=409,
+        detail=f"{model.__name__} was modified by another request (now version {current}); reload and retry",
+    )
+
+
+def update_returning(
+    db: Session, model, row_id: int, values: dict, expected_version: Optional[int] = None, commit: bool = True
+) -> Row:
+    """Apply ``values`` to row ``row_id`` of ``model`` and commit; returns the updated row.
+
+    With ``commit=False`` the caller commits, after more writes in the same
+    transaction; the updated row stays locked until then.
+    """
+    table = model.__table__
+    if values:
+        statement = update(table).where(*_conditions(table, row_id, expected_version)).values(values).returning(*table.c)
+    else:
+        statement = select(table).where(*_conditions(table, row_id, expected_version))
+    row = db.execute(statement).one_or_none()
+    if row is None:
+        _raise_missing_or_conflict(db, model, row_id)
+    if commit:
+        db.commit()
+    return row
+
+
+def record_deletions(db: Session, model, row_ids: Iterable[int]):
+    """Add tombstones for deleted rows of ``model``; the caller commits."""
+    rows = [{"entity": model.__tablename__, "entity_id": row_id} for row_id in row_ids]
+    if rows:
+        db.execute(insert(Tombstone), rows)
+
+
+def delete_returning(
+    db: Session, model, row_id: int, expected_version: Optional[int] = None, commit: bool = True
+) -> Row:
+    """Delete row ``row_id`` of ``model`` and commit; returns the deleted row.
+
+    With ``commit=False`` the caller commits, as for ``update_returning``.
+    """
+    table = model.__table__
+    row = db.execute(
+        delete(table).where(*_conditions(table, row_id, expected_version)).returning(*table.c)
+    ).one_or_none()
+    if row is None:
+        _raise_missing_or_conflict(db, model, row_id)
+    record_deletions(db, model, [row_id])
+    if commit:
+        db.commit()
+    return row
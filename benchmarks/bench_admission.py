@@ -0,0 +1,70 @@
+"""Latency of writes and health checks while bulk reads flood the API.
+
+Many clients request the task stats (a bulk read) in a loop while a few
+clients create tasks and poll ``/api/health``, first without admission
+control, then with it. Without it every request queues for the same
+threadpool and database; with it bulk reads are capped and shed with 503/429
+ahead of the writes and health checks. Each line reports the status mix, so
+writes that failed do not pass for fast ones.
+
+    python -m benchmarks.bench_admission [tasks] [bulk_clients] [seconds]
+"""
+import asyncio
+import json
+import sys
+import time
+
+from benchmarks.common import asgi_request, percentile, reset_database, seed_tasks
+
+
+async def client_loop(app, label, method, path, stop_at, results, pause=0.0, body=None):
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            status, _ = await asgi_request(app, method, path, body_chunks=[body() if body else b""])
+        except Exception as e:  # a failed request is a result, not a crash
+            status = type(e).__name__
+        latencies, statuses = results.setdefault(label, ([], {}))
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+        if pause:
+            await asyncio.sleep(pause)
+
+
+async def run(app, bulk_clients: int, seconds: float) -> dict:
+    results = {}
+    stop_at = time.perf_counter() + seconds
+    clients = [client_loop(app, "bulk_read", "GET", "/api/tasks/stats", stop_at, results) for _ in range(bulk_clients)]
+    def task():
+        return json.dumps({"title": f"Write {time.perf_counter()}", "priority": "high"}).encode()
+
+    clients += [
+        client_loop(app, "write", "POST", "/api/tasks/", stop_at, results, pause=0.01, body=task) for _ in range(4)
+    ]
+    clients.append(client_loop(app, "health", "GET", "/api/health", stop_at, results, pause=0.05))
+    await asyncio.gather(*clients)
+    return results
+
+
+def main(tasks: int = 50000, bulk_clients: int = 128, seconds: float = 5.0):
+    from backend.config import settings
+    from backend.main import app
+
+    reset_database()
+    seed_tasks(tasks)
+
+    for enabled in (False, True):
+        settings.ADMISSION_CONTROL = enabled
+        settings.ADMISSION_ROUTE_LIMITS = {"GET /api/tasks/stats": 4}
+        print(f"admission control {'on' if enabled else 'off'}")
+        results = asyncio.run(run(app, bulk_clients, seconds))
+        for label, (latencies, statuses) in sorted(results.items()):
+            codes = " ".join(f"{code}:{count}" for code, count in sorted(statuses.items(), key=str))
+            print(
+                f"  {label:<10} {len(latencies):>6} reqs  p50 {percentile(latencies, 50) * 1000:8.1f}  "
+                f"p99 {percentile(latencies, 99) * 1000:8.1f} ms  {codes}"
+            )
+
+
+if __name__ == "__main__":
+    main(*[float(arg) if i == 2 else int(arg) for i, arg in enumerate(sys.argv[1:])])
@@ -0,0 +1,71 @@
+"""Compare request latency of the sync and async (DB_ASYNC) database paths.
+
+Each mode runs in its own process because settings and engines are created
+once per process.
+Requests go through the ASGI app concurrently, so the sync path is bounded by
+the Starlette threadpool while the async path is bounded by the pool.
+
+    python -m benchmarks.bench_async [requests] [concurrency]
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import percentile, reset_database, seed_tasks
+
+
+async def _drive(app, requests: int, concurrency: int):
+    import httpx
+
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def one(i):
+            async with semaphore:
+                start = time.perf_counter()
+                if i % 5 == 0:
+                    response = await client.post("/api/tasks/", json={"title": f"Load {i}"})
+                else:
+                    response = await client.get("/api/tasks/?limit=50")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    return latencies, elapsed
+
+
+def child(requests: int, concurrency: int):
+    from run import app
+
+    reset_database()
+    seed_tasks(500)
+    latencies, elapsed = asyncio.run(_drive(app, requests, concurrency))
+    mode = "async" if os.environ.get("DB_ASYNC", "").lower() in ("1", "true") else "sync"
+    print(
+        f"{mode:<6} {requests / elapsed:8.1f} req/s  "
+        f"p50 {percentile(latencies, 50) * 1000:7.1f} ms  "
+        f"p99 {percentile(latencies, 99) * 1000:7.1f} ms"
+    )
+
+
+def main(requests: int = 2000, concurrency: int = 200):
+    for db_async in ("false", "true"):
+        env = dict(os.environ, DB_ASYNC=db_async)
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_async", "--child", str(requests), str(concurrency)],
+            env=env,
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == "--child":
+        child(*(int(arg) for arg in args[1:]))
+    else:
+        main(*(int(arg) for arg in args))
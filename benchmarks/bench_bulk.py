@@ -0,0 +1,37 @@
+"""Compare one-request-per-task writes with the /api/tasks/bulk endpoints.
+
+    python -m benchmarks.bench_bulk [count]
+"""
+import sys
+
+from benchmarks.common import reset_database, timed
+
+
+def main(count: int = 1000):
+    from fastapi.testclient import TestClient
+    from run import app
+
+    payload = [{"title": f"Task {i}", "priority": "high"} for i in range(count)]
+    with TestClient(app) as client:
+        reset_database()
+        with timed("create one at a time", count):
+            ids = [client.post("/api/tasks/", json=task).json()["id"] for task in payload]
+        with timed("update one at a time", count):
+            for task_id in ids:
+                client.put(f"/api/tasks/{task_id}", json={"status": "completed"})
+        with timed("delete one at a time", count):
+            for task_id in ids:
+                client.delete(f"/api/tasks/{task_id}")
+
+        reset_database()
+        with timed("bulk create", count):
+            results = client.post("/api/tasks/bulk", json=payload).json()["results"]
+        ids = [result["id"] for result in results]
+        with timed("bulk update", count):
+            client.patch("/api/tasks/bulk", json=[{"id": i, "status": "completed"} for i in ids])
+        with timed("bulk delete", count):
+            client.request("DELETE", "/api/tasks/bulk", json=ids)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
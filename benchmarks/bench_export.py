@@ -0,0 +1,37 @@
+"""Export throughput and peak Python memory for different table sizes.
+
+The app is driven directly over ASGI and the body is discarded as it
+arrives, so the peak measures the server side only (test clients buffer the
+whole body). It should stay roughly constant as the row count grows.
+
+    python -m benchmarks.bench_export [rows ...]
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import asgi_request, reset_database, seed_tasks
+
+
+def main(*sizes: int):
+    from run import app
+
+    for size in sizes or (1000, 10000, 50000):
+        reset_database()
+        seed_tasks(size)
+        for export_format in ("ndjson", "csv"):
+            tracemalloc.start()
+            start = time.perf_counter()
+            _, received = asyncio.run(asgi_request(app, "GET", "/api/tasks/export", f"format={export_format}"))
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{export_format:<7} {size:>8} rows  {size / elapsed:10.1f} rows/s  "
+                f"{received / 1e6:8.1f} MB sent  peak {peak / 1e6:6.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,54 @@
+"""Password verification throughput under concurrent logins, and its effect on the event loop.
+
+Compares verifying bcrypt hashes inline in a coroutine (the old behaviour of
+an async login path) with the bounded hashing pool from backend.security.
+A heartbeat task measures how long the event loop is stalled meanwhile.
+
+    python -m benchmarks.bench_hashing [logins] [rounds]
+"""
+import asyncio
+import sys
+import time
+
+import benchmarks.common  # noqa: F401  (environment defaults)
+from backend import security
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lags.append(time.perf_counter() - start - 0.005)
+
+
+async def _run(label: str, verify, logins: int, hashed: str):
+    stop, lags = asyncio.Event(), []
+    heartbeat = asyncio.create_task(_heartbeat(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(verify("correct horse", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await heartbeat
+    print(
+        f"{label:<16} {logins / elapsed:8.1f} logins/s  "
+        f"max event loop stall {max(lags, default=0) * 1000:8.1f} ms"
+    )
+
+
+async def main(logins: int = 64, rounds: int = 12):
+    context = security.make_password_context(rounds)
+    hashed = context.hash("correct horse")
+
+    async def inline(password, hashed_password):
+        return context.verify_and_update(password, hashed_password)
+
+    async def pooled(password, hashed_password):
+        return await security.verify_and_update_async(password, hashed_password, context=context)
+
+    print(f"bcrypt rounds={rounds}, hashing workers={security.get_hash_executor()._max_workers}")
+    await _run("inline", inline, logins, hashed)
+    await _run("hashing pool", pooled, logins, hashed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:])))
@@ -0,0 +1,69 @@
+"""Import throughput (rows/s) and peak Python memory for CSV and NDJSON uploads.
+
+The upload is generated lazily and fed to the app over ASGI in 64 KiB chunks,
+so neither side of the benchmark holds the whole file.
+
+    python -m benchmarks.bench_import [rows ...]
+"""
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import asgi_request, reset_database
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _lines(export_format: str, rows: int):
+    if export_format == "csv":
+        yield "title,description,status,priority,due_date\n"
+    for i in range(rows):
+        if export_format == "csv":
+            yield f'Task {i},"Imported, row {i}",pending,high,2030-01-01T00:00:00+00:00\n'
+        else:
+            yield json.dumps({
+                "title": f"Task {i}",
+                "description": f"Imported row {i}",
+                "priority": "high",
+                "due_date": "2030-01-01T00:00:00+00:00",
+            }) + "\n"
+
+
+def _chunks(lines):
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def main(*sizes: int):
+    from run import app
+
+    for rows in sizes or (10000, 100000):
+        for import_format in ("csv", "ndjson"):
+            reset_database()
+            tracemalloc.start()
+            start = time.perf_counter()
+            status, _ = asyncio.run(asgi_request(
+                app, "POST", "/api/tasks/import", f"format={import_format}", _chunks(_lines(import_format, rows)),
+            ))
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{import_format:<7} {rows:>8} rows  status {status}  "
+                f"{rows / elapsed:10.1f} rows/s  peak {peak / 1e6:6.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,65 @@
+"""Reminders dispatched per second by one or more scheduler workers.
+
+Queues ``count`` reminders that are all due, runs ``workers`` schedulers
+side by side until every reminder has fired, and checks that none fired
+twice. The workers share this process, so on SQLite they also share one
+writer; against PostgreSQL their claims run in parallel and skip each
+other's rows with ``FOR UPDATE SKIP LOCKED``.
+
+    python -m benchmarks.bench_reminders [count] [batch_size]
+"""
+import asyncio
+import sys
+import time
+from collections import Counter
+
+from benchmarks.common import reset_database, seed_tasks
+
+
+async def dispatch_all(count: int, workers: int, batch_size: int) -> float:
+    from backend.reminders import ReminderScheduler
+
+    fired = Counter()
+    done = asyncio.Event()
+
+    async def dispatch(tasks):
+        fired.update(task.id for task in tasks)
+        if len(fired) >= count:
+            done.set()
+
+    schedulers = [ReminderScheduler(dispatch=dispatch) for _ in range(workers)]
+    for scheduler in schedulers:
+        scheduler.batch_size = batch_size
+    start = time.perf_counter()
+    running = [asyncio.create_task(scheduler.run()) for scheduler in schedulers]
+    await done.wait()
+    elapsed = time.perf_counter() - start
+    for scheduler in schedulers:
+        scheduler.stop()
+    await asyncio.gather(*running)
+    assert len(fired) == count and max(fired.values()) == 1, "a reminder fired twice or not at all"
+    return elapsed
+
+
+def main(count: int = 20000, batch_size: int = 500):
+    from datetime import timedelta
+
+    from sqlalchemy import select, update
+
+    from backend.database import get_database
+    from backend.models import Task, utcnow
+    from backend.reminders import schedule_reminders
+
+    for workers in (1, 2, 4):
+        reset_database()
+        seed_tasks(count, categories=0)
+        with get_database().SessionLocal() as db:
+            db.execute(update(Task).values(reminder=utcnow() - timedelta(seconds=1)))
+            schedule_reminders(db, db.scalars(select(Task.id)).all())
+            db.commit()
+        elapsed = asyncio.run(dispatch_all(count, workers, batch_size))
+        print(f"{workers} workers  {count:>7} reminders  {elapsed:8.3f} s  {count / elapsed:10.1f} reminders/s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,69 @@
+"""Latency of ``GET /api/tasks/?q=`` for rare and common terms.
+
+Runs against PostgreSQL full-text search when DATABASE_URL points at
+PostgreSQL, and against the in-memory index otherwise.
+
+    python -m benchmarks.bench_search [count] [requests]
+"""
+import random
+import sys
+import time
+
+from benchmarks.common import percentile, reset_database
+
+VOCABULARY = [f"word{i}" for i in range(5000)]
+# Zipf-like: a few words are everywhere, most are rare
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def seed(count: int):
+    from sqlalchemy import insert
+
+    from backend.database import get_database
+    from backend.models import Task
+
+    rng = random.Random(0)
+    with get_database().SessionLocal() as db:
+        for start in range(0, count, 10000):
+            db.execute(insert(Task), [
+                {
+                    "title": " ".join(rng.choices(VOCABULARY, WEIGHTS, k=4)),
+                    "description": " ".join(rng.choices(VOCABULARY, WEIGHTS, k=20)),
+                }
+                for _ in range(start, min(start + 10000, count))
+            ])
+        db.commit()
+
+
+def main(count: int = 100_000, requests: int = 200):
+    from fastapi.testclient import TestClient
+    from run import app
+
+    reset_database()
+    seed(count)
+    queries = {
+        "common term": "word0",
+        "rare term": "word4000",
+        "two terms": "word1 word50",
+        "common term + filter": "word0",
+    }
+    with TestClient(app) as client:
+        for label, q in queries.items():
+            params = {"q": q, "limit": 20}
+            if "filter" in label:
+                params["priority"] = "medium"
+            client.get("/api/tasks/", params=params)  # warm up (builds the in-memory index)
+            samples = []
+            for i in range(requests):
+                # A distinct skip per request keeps the response cache out of the measurement
+                start = time.perf_counter()
+                client.get("/api/tasks/", params={**params, "skip": i % 5, "limit": 20 + i})
+                samples.append((time.perf_counter() - start) * 1000)
+            print(
+                f"{label:<24} p50 {percentile(samples, 50):7.2f} ms  "
+                f"p95 {percentile(samples, 95):7.2f} ms  p99 {percentile(samples, 99):7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
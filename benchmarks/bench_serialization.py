@@ -0,0 +1,74 @@
+"""Time to load and encode one page of ``GET /api/tasks/``.
+
+Compares, per page size:
+
+* ``orm + jsonable_encoder``: ORM entities with the category joined, validated
+  one by one through ``response_model`` and encoded with ``json.dumps`` (the
+  default FastAPI path)
+* ``orm + TypeAdapter``: the same entities validated from attributes in one
+  batch and encoded by pydantic-core
+* ``rows + TypeAdapter``: column tuples turned into dicts, validated in one
+  batch and encoded by pydantic-core (what the routes do now)
+
+    python -m benchmarks.bench_serialization [tasks] [repeat]
+"""
+import sys
+import time
+from typing import List
+
+from benchmarks.common import percentile, reset_database, seed_tasks
+
+
+def main(count: int = 5000, repeat: int = 50):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+    from sqlalchemy.orm import joinedload
+
+    from backend.database import get_database
+    from backend.models import Task
+    from backend.schemas import TaskWithCategory
+    from backend.serialization import task_dicts, task_rows
+
+    reset_database()
+    seed_tasks(count, categories=20)
+    adapter = TypeAdapter(List[TaskWithCategory])
+    SessionLocal = get_database().SessionLocal
+
+    def orm_page(db, limit):
+        return db.query(Task).options(joinedload(Task.category)).order_by(Task.id).limit(limit).all()
+
+    def orm_default(db, limit):
+        tasks = [TaskWithCategory.model_validate(task) for task in orm_page(db, limit)]
+        return JSONResponse(jsonable_encoder(tasks)).body
+
+    def orm_adapter(db, limit):
+        return adapter.dump_json(adapter.validate_python(orm_page(db, limit), from_attributes=True))
+
+    def rows_adapter(db, limit):
+        return adapter.dump_json(adapter.validate_python(task_dicts(task_rows(db).order_by(Task.id).limit(limit))))
+
+    paths = {
+        "orm + jsonable_encoder": orm_default,
+        "orm + TypeAdapter": orm_adapter,
+        "rows + TypeAdapter": rows_adapter,
+    }
+    for limit in (100, 1000):
+        with SessionLocal() as db:
+            assert orm_adapter(db, limit) == rows_adapter(db, limit)
+        for label, path in paths.items():
+            samples = []
+            for _ in range(repeat):
+                # A fresh session per page, as per request
+                with SessionLocal() as db:
+                    start = time.perf_counter()
+                    path(db, limit)
+                    samples.append((time.perf_counter() - start) * 1000)
+            print(
+                f"{limit:>5} rows  {label:<24} p50 {percentile(samples, 50):8.2f} ms  "
+                f"p95 {percentile(samples, 95):8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
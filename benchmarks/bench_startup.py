@@ -0,0 +1,50 @@
+"""Cold start of a worker: importing ``backend.main`` and running its startup.
+
+Each sample is a fresh interpreter, as when a process manager or autoscaler
+spawns a worker. ``import`` is the time to import the app module; ``startup``
+adds the lifespan startup (engines, first middleware build) and the first
+``/api/health`` request.
+
+    python -m benchmarks.bench_startup [samples]
+"""
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import percentile, reset_database
+
+CHILD = """
+import asyncio, json, time
+start = time.perf_counter()
+from backend.main import app
+imported = time.perf_counter()
+
+async def first_request():
+    import httpx
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://startup") as client:
+            (await client.get("/api/health")).raise_for_status()
+
+asyncio.run(first_request())
+ready = time.perf_counter()
+print(json.dumps({"import": imported - start, "startup": ready - start}))
+"""
+
+
+def main(samples: int = 10):
+    reset_database()
+    results = {"import": [], "startup": []}
+    for _ in range(samples):
+        output = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", CHILD],
+            capture_output=True, text=True, check=True, env=os.environ.copy(),
+        ).stdout
+        for key, value in json.loads(output.splitlines()[-1]).items():
+            results[key].append(value * 1000)
+    for key, values in results.items():
+        print(f"{key:<8} p50 {percentile(values, 50):8.1f} ms  max {max(values):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
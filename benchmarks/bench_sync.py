@@ -0,0 +1,60 @@
+"""Cost of a delta sync as the dataset grows while the changes do not.
+
+For each dataset size a client first syncs everything, then ``changes`` tasks
+are updated and deleted and the client syncs again from its watermark. The
+incremental sync reads three keyset ranges on the ``(updated_at, id)`` and
+``(deleted_at, id)`` indexes, so its time should stay flat across sizes.
+
+    python -m benchmarks.bench_sync [changes] [repeat]
+"""
+import os
+import sys
+import time
+
+from benchmarks.common import percentile, reset_database, seed_tasks
+
+os.environ.setdefault("SYNC_LAG_SECONDS", "0")
+
+
+def full_sync(db, sync):
+    watermark = None
+    while True:
+        page = sync(db, watermark, 5000)
+        watermark = page["watermark"]
+        if not page["has_more"]:
+            return watermark
+
+
+def main(changes: int = 100, repeat: int = 50):
+    from backend.database import get_database
+    from backend.models import Task
+    from backend.routes.sync import _sync
+    from backend.writes import delete_returning, update_returning
+
+    SessionLocal = get_database().SessionLocal
+    for size in (1000, 10000, 100000):
+        reset_database()
+        seed_tasks(size, categories=20)
+        with SessionLocal() as db:
+            start = time.perf_counter()
+            watermark = full_sync(db, _sync)
+            full = (time.perf_counter() - start) * 1000
+            for i in range(1, changes + 1):
+                update_returning(db, Task, i, {"title": f"Changed {i}"})
+            for i in range(changes + 1, 2 * changes + 1):
+                delete_returning(db, Task, i)
+        samples = []
+        for _ in range(repeat):
+            with SessionLocal() as db:
+                start = time.perf_counter()
+                page = _sync(db, watermark, 500)
+                samples.append((time.perf_counter() - start) * 1000)
+        assert (len(page["tasks"]), len(page["deleted"]["tasks"])) == (changes, changes)
+        print(
+            f"{size:>7} tasks  full sync {full:9.1f} ms  delta sync p50 {percentile(samples, 50):7.2f} ms  "
+            f"p95 {percentile(samples, 95):7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,63 @@
+"""Tag filters and counts as the number of tasks grows.
+
+Each task gets up to four tags from a vocabulary where a few tags are common
+and most are rare. Times a first page of ``GET /api/tasks/`` filtered by all
+of two tags (``tags=``) and by any of two (``any_tags=``), for a common and a
+rare pair, and the tag counts.
+
+    python -m benchmarks.bench_tags [repeat]
+"""
+import random
+import sys
+import time
+
+from benchmarks.common import percentile, reset_database, seed_tasks
+
+VOCABULARY = [f"tag{i}" for i in range(200)]
+QUERIES = {
+    "tags=tag0,tag1": {"tags": ["tag0", "tag1"]},
+    "tags=tag150,tag151": {"tags": ["tag150", "tag151"]},
+    "any_tags=tag0,tag1": {"any_tags": ["tag0", "tag1"]},
+    "any_tags=tag150,tag151": {"any_tags": ["tag150", "tag151"]},
+}
+
+
+def seed_tags(count: int, seed: int = 0):
+    from backend.database import get_database
+    from backend.tags import set_task_tags
+
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+    with get_database().SessionLocal() as db:
+        for start in range(1, count + 1, 10000):
+            set_task_tags(db, {
+                task_id: rng.choices(VOCABULARY, weights, k=rng.randint(0, 4))
+                for task_id in range(start, min(start + 10000, count + 1))
+            })
+        db.commit()
+
+
+def main(repeat: int = 20):
+    from backend.database import get_database
+    from backend.routes.tasks import _read_tasks, _tag_counts
+
+    for size in (10000, 100000):
+        reset_database()
+        seed_tasks(size, categories=20)
+        seed_tags(size)
+        timings = {}
+        for label, filters in QUERIES.items():
+            timings[label] = lambda db, filters=filters: _read_tasks(db, filters, "id", 100, 0, None)
+        timings["tag counts"] = lambda db: _tag_counts(db, {}, 100)
+        for label, run in timings.items():
+            samples = []
+            for _ in range(repeat):
+                with get_database().SessionLocal() as db:
+                    start = time.perf_counter()
+                    run(db)
+                    samples.append((time.perf_counter() - start) * 1000)
+            print(f"{size:>7} tasks  {label:<24} p50 {percentile(samples, 50):8.2f} ms  p95 {percentile(samples, 95):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
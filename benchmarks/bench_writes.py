@@ -0,0 +1,76 @@
+"""Statements and time per single-row update and delete.
+
+Compares the ORM round trips the task routes used to make (SELECT the row,
+set attributes, flush on commit, SELECT again to refresh) with the single
+``UPDATE/DELETE ... RETURNING`` statement of ``backend.writes``. Both delete
+paths record the sync tombstone, so they do the same work. The gap grows with
+the network latency to the database, so run it against PostgreSQL as well as
+the default SQLite file.
+
+    python -m benchmarks.bench_writes [count]
+"""
+import sys
+
+from sqlalchemy import event
+
+from benchmarks.common import reset_database, seed_tasks, timed
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def orm_update(db, model, row_id, values):
+    row = db.query(model).filter(model.id == row_id).first()
+    for key, value in values.items():
+        setattr(row, key, value)
+    db.commit()
+    db.refresh(row)
+    return row
+
+
+def orm_delete(db, model, row_id):
+    from backend.writes import record_deletions
+
+    row = db.query(model).filter(model.id == row_id).first()
+    db.delete(row)
+    record_deletions(db, model, [row_id])
+    db.commit()
+    return row
+
+
+def main(count: int = 2000):
+    from backend.database import get_database
+    from backend.models import Task, TaskStatus
+    from backend.writes import delete_returning, update_returning
+
+    reset_database()
+    seed_tasks(count * 2, categories=0)
+    counter = StatementCounter(get_database().engine)
+    statuses = list(TaskStatus)
+
+    for label, update, delete in (
+        ("orm", orm_update, orm_delete),
+        ("returning", update_returning, delete_returning),
+    ):
+        offset = 0 if label == "orm" else count
+        with get_database().SessionLocal() as db:
+            counter.count = 0
+            with timed(f"{label} update", count):
+                for i in range(count):
+                    update(db, Task, offset + i + 1, {"title": f"Updated {i}", "status": statuses[i % len(statuses)]})
+            print(f"{'':<32} {counter.count / count:7.2f} statements per update")
+            counter.count = 0
+            with timed(f"{label} delete", count):
+                for i in range(count):
+                    delete(db, Task, offset + i + 1)
+            print(f"{'':<32} {counter.count / count:7.2f} statements per delete")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,121 @@
+"""Shared setup for the benchmark scripts.
+
+Benchmarks run against ``DATABASE_URL`` when it is set and otherwise against
+a throwaway SQLite file, so they need no external services.
+"""
+import math
+import os
+import time
+from contextlib import contextmanager
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+
+def reset_database():
+    from backend import models  # noqa: F401  registers the tables on Base
+    from backend.database import Base, get_database
+
+    engine = get_database().engine
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+@contextmanager
+def timed(label: str, operations: int):
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {operations:>7} ops  {elapsed:8.3f} s  {operations / elapsed:10.1f} ops/s")
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def seed_tasks(count: int, categories: int = 10, seed: int = 0):
+    """Insert ``count`` tasks spread over ``categories`` categories, statuses,
+    priorities and due dates. The same arguments always produce the same rows."""
+    import random
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import insert
+
+    from backend.database import get_database
+    from backend.models import Category, Task, TaskPriority, TaskStatus
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    with get_database().SessionLocal() as db:
+        category_ids = db.scalars(
+            insert(Category).returning(Category.id),
+            [{"name": f"Category {i}"} for i in range(categories)],
+        ).all()
+        for start in range(0, count, 10000):
+            db.execute(insert(Task), [
+                {
+                    "title": f"Task {i}",
+                    "description": "Seeded",
+                    "status": rng.choice(list(TaskStatus)),
+                    "priority": rng.choice(list(TaskPriority)),
+                    "due_date": now + timedelta(hours=rng.randint(-240, 240)) if rng.random() < 0.7 else None,
+                    "category_id": category_ids[i % len(category_ids)] if category_ids else None,
+                }
+                for i in range(start, min(start + 10000, count))
+            ])
+        db.commit()
+
+
+async def asgi_request(app, method: str, path: str, query_string: str = "", body_chunks=()):
+    """Send one request straight to the ASGI app and discard the response body.
+
+    Test clients buffer whole request and response bodies; this streams both,
+    so memory measurements only see the server. Returns ``(status, body_bytes)``.
+    """
+    import asyncio
+
+    chunks = iter(body_chunks)
+    finished = asyncio.Event()
+    body_sent = False
+    status, received = None, 0
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            chunk = next(chunks, None)
+            if chunk is not None:
+                return {"type": "http.request", "body": chunk, "more_body": True}
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, received
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string.encode(),
+        "headers": [(b"host", b"benchmark")],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    await app(scope, receive, send)
+    return status, received
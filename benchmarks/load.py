@@ -0,0 +1,206 @@
+"""Load test of the API: throughput and latency percentiles per endpoint.
+
+Seeds a fresh database, then drives the FastAPI app with concurrent clients,
+one scenario at a time, and writes the results as JSON so runs can be
+compared across commits. By default requests go to the app in-process
+through ASGI; ``--url`` targets a running server instead (seed it with the
+same ``DATABASE_URL``).
+
+    python -m benchmarks.load --tasks 10000 --categories 20 --concurrency 16 \\
+        --requests 1000 --output results.json
+    python -m benchmarks.load --compare baseline.json results.json
+
+Runs against ``DATABASE_URL`` (SQLite file by default, or a local PostgreSQL)
+and needs no other services. Request parameters come from a seeded random
+generator, so two runs issue the same requests.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.common import percentile, reset_database, seed_tasks
+
+
+class Scenario:
+    """One endpoint under load; ``request(rng, state)`` returns (method, path, kwargs)."""
+
+    def __init__(self, name, request):
+        self.name = name
+        self.request = request
+
+
+def _task_id(rng, state):
+    return rng.randint(1, state["tasks"])
+
+
+SCENARIOS = [
+    Scenario("list_tasks", lambda rng, state: ("GET", "/api/tasks/", {"params": {"limit": 50, "skip": rng.randint(0, 50) * 50}})),
+    Scenario("list_tasks_filtered", lambda rng, state: ("GET", "/api/tasks/", {"params": {
+        "status": rng.choice(["pending", "in_progress", "completed"]),
+        "priority": rng.choice(["low", "medium", "high"]),
+        "limit": 50,
+    }})),
+    Scenario("list_tasks_by_due_date", lambda rng, state: ("GET", "/api/tasks/", {"params": {"sort": "due_date", "limit": 50}})),
+    Scenario("search_tasks", lambda rng, state: ("GET", "/api/tasks/", {"params": {"q": f"Task {rng.randint(1, state['tasks'])}"}})),
+    Scenario("read_task", lambda rng, state: ("GET", f"/api/tasks/{_task_id(rng, state)}", {})),
+    Scenario("task_stats", lambda rng, state: ("GET", "/api/tasks/stats", {})),
+    Scenario("list_categories", lambda rng, state: ("GET", "/api/categories/", {})),
+    Scenario("create_task", lambda rng, state: ("POST", "/api/tasks/", {"json": {
+        "title": f"Load {rng.random()}", "priority": rng.choice(["low", "medium", "high"]),
+    }})),
+    Scenario("update_task", lambda rng, state: ("PUT", f"/api/tasks/{_task_id(rng, state)}", {"json": {
+        "status": rng.choice(["pending", "in_progress", "completed"]),
+    }})),
+]
+
+
+async def run_scenario(client, scenario: Scenario, requests: int, concurrency: int, state: dict, seed: int) -> dict:
+    rng = random.Random(f"{seed}:{scenario.name}")
+    plan = [scenario.request(rng, state) for _ in range(requests)]
+    latencies = []
+    statuses = {}
+    next_request = iter(plan)
+
+    async def worker():
+        for method, path, kwargs in next_request:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                status = str(response.status_code)
+            except Exception as e:  # a failed request is a result, not a crash
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status_counts": statuses,
+        "duration_s": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        from run import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=60)
+
+    state = {"tasks": args.tasks}
+    selected = [s for s in SCENARIOS if not args.scenarios or s.name in args.scenarios]
+    results = {}
+    async with client:
+        for scenario in selected:
+            # Warm up connections, caches and the search index
+            await run_scenario(client, scenario, min(args.requests, 20), 1, state, args.seed + 1)
+            results[scenario.name] = await run_scenario(
+                client, scenario, args.requests, args.concurrency, state, args.seed
+            )
+            result = results[scenario.name]
+            print(
+                f"{scenario.name:<24} {result['throughput_rps']:9.1f} req/s  "
+                f"p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms  "
+                f"errors {result['errors']}",
+                file=sys.stderr,
+            )
+    return results
+
+
+def compare(baseline_path: str, current_path: str):
+    """Print per-endpoint changes in throughput and p95/p99 between two result files."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+    print(f"{'scenario':<24} {'req/s':>16} {'p95 ms':>18} {'p99 ms':>18}")
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        cells = []
+        for key in ("throughput_rps", "p95_ms", "p99_ms"):
+            change = (result[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            cells.append(f"{result[key]:9.1f} ({change:+5.1f}%)")
+        print(f"{name:<24} " + " ".join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10000, help="tasks to seed")
+    parser.add_argument("--categories", type=int, default=20, help="categories to seed")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--scenarios", nargs="*", help=f"subset of: {' '.join(s.name for s in SCENARIOS)}")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for data and requests")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--no-response-cache", action="store_true", help="measure reads without the response cache")
+    parser.add_argument("--output", help="write results as JSON to this file (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.no_response_cache:
+        os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    reset_database()
+    seed_tasks(args.tasks, categories=args.categories, seed=args.seed)
+
+    from backend.database import get_database
+
+    results = asyncio.run(run(args))
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "database": get_database().engine.dialect.name,
+            "target": args.url or "in-process",
+            "python": platform.python_version(),
+            "tasks": args.tasks,
+            "categories": args.categories,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "response_cache": not args.no_response_cache,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import os
 
@@ -6,14 +7,17 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timezone
 
 # Import your FastAPI app and models
 from run import app
-from backend.database import Base, get_db
+from backend.database import Base, get_db, async_url
 from backend.models import Category, Task, TaskStatus, TaskPriority
+from backend import migrations
+from backend.routes.tasks import filter_tasks
+from backend.response_cache import response_cache
 
 # Use a separate test database for tests
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
@@ -33,10 +37,28 @@ def override_get_db():
 
 app.dependency_overrides[get_db] = override_get_db
 
+@pytest.fixture(scope="function")
+def foreign_keys():
+    """Make SQLite enforce foreign keys, as PostgreSQL does, on new connections."""
+    if engine.dialect.name != "sqlite":
+        yield
+        return
+
+    def enforce_foreign_keys(connection, record):
+        connection.execute("PRAGMA foreign_keys=ON")
+
+    event.listen(engine, "connect", enforce_foreign_keys)
+    engine.dispose()
+    yield
+    event.remove(engine, "connect", enforce_foreign_keys)
+    engine.dispose()
+
 @pytest.fixture(scope="function")
 def client():
     # Create tables before each test
     Base.metadata.create_all(bind=engine)
+    # Tests write rows behind the API's back, which the response cache cannot see
+    asyncio.run(response_cache.clear())
     with TestClient(app) as c:
         yield c
     # Drop tables after each test
@@ -52,6 +74,20 @@ def db():
         db.close()
     Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture
+def query_counter():
+    """Collects every SQL statement sent through the test engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
 
 def test_health_check(client):
     response = client.get("/api/health")
@@ -59,6 +95,20 @@ def test_health_check(client):
     assert response.json() == {"status": "healthy", "database": "connected"}
 
 
+def test_importing_app_reads_no_settings_and_opens_no_connection(tmp_path):
+    import subprocess
+
+    # Without DATABASE_URL or SECRET_KEY, building Settings would fail
+    env = {key: value for key, value in os.environ.items() if key not in ("DATABASE_URL", "SECRET_KEY")}
+    env["PYTHONPATH"] = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    check = (
+        "import backend.main, backend.config, backend.database, backend.events; "
+        "assert backend.config.get_settings.cache_info().currsize == 0; "
+        "assert backend.database._database is None and backend.events._broker is None"
+    )
+    subprocess.run([sys.executable, "-W", "ignore", "-c", check], cwd=tmp_path, env=env, check=True)
+
+
 def test_create_category(client):
     response = client.post(
         "/api/categories/",
@@ -136,7 +186,7 @@ def test_update_task(client, db):
     assert data["status"] == TaskStatus.COMPLETED.value
 
 
-def test_delete_task(client, db):
+def test_delete_task(client, db, query_counter):
     # Create a task
     task = Task(title="Task to Delete", status=TaskStatus.PENDING.value)
     db.add(task)
@@ -144,8 +194,12 @@ def test_delete_task(client, db):
     db.refresh(task)
 
     # Delete the task
+    query_counter.clear()
     response = client.delete(f"/api/tasks/{task.id}")
     assert response.status_code == 204
+    # DELETE ... RETURNING and the tombstone; SQLite does not cascade, so
+    # the task's tags and reminders are cleared by hand as well
+    assert len(query_counter) == 4
 
     # Verify task is deleted
     response = client.get(f"/api/tasks/{task.id}")
@@ -211,6 +265,105 @@ def test_delete_category(client, db):
     assert get_response.status_code == 404
 
 
+def test_writes_check_versions(client, db, query_counter):
+    category = Category(name="Work", color="#000000")
+    db.add(category)
+    db.commit()
+    task = Task(title="Versioned", category_id=category.id)
+    db.add(task)
+    db.commit()
+    db.refresh(task)
+
+    query_counter.clear()
+    response = client.put(f"/api/tasks/{task.id}", json={"title": "First", "version": 1})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert len(query_counter) == 1
+
+    # A writer still holding version 1 is refused instead of overwriting "First"
+    response = client.put(f"/api/tasks/{task.id}", json={"title": "Stale", "version": 1})
+    assert response.status_code == 409
+    assert "now version 2" in response.json()["detail"]
+    assert client.get(f"/api/tasks/{task.id}").json()["title"] == "First"
+
+    response = client.patch("/api/tasks/bulk", json=[{"id": task.id, "status": "completed", "version": 1}])
+    assert [r["status"] for r in response.json()["results"]] == [409]
+
+    assert client.delete(f"/api/tasks/{task.id}", params={"version": 1}).status_code == 409
+    assert client.put("/api/tasks/999999", json={"title": "Missing"}).status_code == 404
+
+    response = client.put(f"/api/categories/{category.id}", json={"name": "Office", "color": "#111111", "version": 1})
+    assert response.json()["version"] == 2
+    response = client.put(f"/api/categories/{category.id}", json={"name": "Stale", "color": "#111111", "version": 1})
+    assert response.status_code == 409
+    assert client.delete(f"/api/categories/{category.id}", params={"version": 1}).status_code == 409
+
+    # Deleting a category detaches its tasks in the same transaction
+    assert client.delete(f"/api/categories/{category.id}", params={"version": 2}).status_code == 200
+    assert client.get(f"/api/tasks/{task.id}").json()["category_id"] is None
+
+
+def test_read_categories_with_task_counts(client, db, query_counter, monkeypatch):
+    categories = [Category(name="Work"), Category(name="Home"), Category(name="Empty")]
+    db.add_all(categories)
+    db.commit()
+    work, home, empty = (category.id for category in categories)
+    db.add_all([
+        Task(title="A", category_id=work, status=TaskStatus.PENDING),
+        Task(title="B", category_id=work, status=TaskStatus.PENDING),
+        Task(title="C", category_id=work, status=TaskStatus.COMPLETED),
+        Task(title="D", category_id=home, status=TaskStatus.IN_PROGRESS),
+        Task(title="E", status=TaskStatus.PENDING),
+    ])
+    db.commit()
+
+    assert "task_count" not in client.get("/api/categories/").json()[0]
+
+    query_counter.clear()
+    response = client.get("/api/categories/", params={"with_counts": True})
+    assert len(query_counter) == 1
+    counts = {c["id"]: (c["task_count"], c["by_status"]) for c in response.json()}
+    assert counts == {
+        work: (3, {"pending": 2, "in_progress": 0, "completed": 1}),
+        home: (1, {"pending": 0, "in_progress": 1, "completed": 0}),
+        empty: (0, {"pending": 0, "in_progress": 0, "completed": 0}),
+    }
+
+    # Counts follow task writes despite the response cache and ETags, also
+    # on a worker whose cache generations match the client's (a fresh one)
+    from backend.response_cache import response_cache
+
+    monkeypatch.setattr(response_cache, "_backend", None)
+    etag = client.get("/api/categories/", params={"with_counts": True, "limit": 2}).headers["etag"]
+    task_d = db.query(Task.id).filter(Task.title == "D").scalar()
+    client.put(f"/api/tasks/{task_d}", json={"status": "completed"})
+    client.post("/api/tasks/", json={"title": "F", "category_id": home})
+    monkeypatch.setattr(response_cache, "_backend", None)
+    response = client.get("/api/categories/", params={"with_counts": True, "limit": 2}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [(c["task_count"], c["by_status"]["completed"]) for c in response.json()] == [(3, 1), (2, 1)]
+
+
+def test_delete_category_reassigns_tasks(client, db, query_counter):
+    old, new = Category(name="Old"), Category(name="New")
+    db.add_all([old, new])
+    db.commit()
+    old_id, new_id = old.id, new.id
+    db.add_all([Task(title=f"Task {i}", category_id=old_id) for i in range(50)])
+    db.commit()
+
+    assert client.delete(f"/api/categories/{old_id}", params={"reassign_to": old_id}).status_code == 400
+    assert client.delete(f"/api/categories/{old_id}", params={"reassign_to": 999999}).status_code == 404
+
+    query_counter.clear()
+    response = client.delete(f"/api/categories/{old_id}", params={"reassign_to": new_id})
+    assert response.status_code == 200
+    # Existence check, one UPDATE for all tasks, the DELETE and its tombstone
+    assert len(query_counter) == 4
+    tasks = client.get("/api/tasks/", params={"category_id": new_id}).json()
+    assert len(tasks) == 50
+
+
 def test_filter_tasks_by_status(client, db):
     # Create tasks with different statuses
     task1 = Task(title="Pending Task", status=TaskStatus.PENDING.value)
@@ -240,3 +393,1094 @@ def test_filter_tasks_by_status(client, db):
     data = response.json()
     assert len(data) == 1
     assert data[0]["title"] == "Completed Task"
+
+
+def test_read_tasks_query_count(client, db, query_counter):
+    # Tasks spread over several categories must not trigger a lazy load per row
+    categories = [Category(name=f"Category {i}") for i in range(3)]
+    db.add_all(categories)
+    db.commit()
+    for i in range(20):
+        db.add(Task(title=f"Task {i}", category_id=categories[i % 3].id))
+    db.add(Task(title="Uncategorized"))
+    db.commit()
+
+    query_counter.clear()
+    response = client.get("/api/tasks/")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 21
+    assert data[0]["category"]["name"] == "Category 0"
+    assert data[-1]["category"] is None
+    assert len(query_counter) == 1
+
+    query_counter.clear()
+    response = client.get(f"/api/tasks/{data[1]['id']}")
+    assert response.status_code == 200
+    assert response.json()["category"]["name"] == "Category 1"
+    assert len(query_counter) == 1
+
+
+def _collect_pages(client, url):
+    items, pages = [], 0
+    response = client.get(url)
+    while True:
+        assert response.status_code == 200
+        items.extend(response.json())
+        pages += 1
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            return items, pages
+        separator = "&" if "?" in url else "?"
+        response = client.get(f"{url}{separator}cursor={next_cursor}")
+
+
+def test_read_tasks_cursor_pagination(client, db):
+    base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    for i in range(7):
+        # Two tasks share every due date and the last three have none
+        due_date = base.replace(day=1 + i // 2) if i < 4 else None
+        db.add(Task(title=f"Task {i}", due_date=due_date, status=TaskStatus.PENDING.value))
+    db.add(Task(title="Done", status=TaskStatus.COMPLETED.value))
+    db.commit()
+
+    items, pages = _collect_pages(client, "/api/tasks/?limit=3&status=pending")
+    assert [t["title"] for t in items] == [f"Task {i}" for i in range(7)]
+    assert pages == 3
+
+    items, pages = _collect_pages(client, "/api/tasks/?limit=2&sort=due_date&status=pending")
+    assert [t["title"] for t in items] == [f"Task {i}" for i in range(7)]
+    assert pages == 4
+
+    # The offset mode keeps working for existing clients
+    response = client.get("/api/tasks/?skip=6&limit=3")
+    assert [t["title"] for t in response.json()] == ["Task 6", "Done"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_read_lists_reject_out_of_range_limits(client, db):
+    db.add(Task(title="Task"))
+    db.commit()
+    for path in ("/api/tasks/", "/api/categories/"):
+        for params in ({"limit": 0}, {"limit": -1}, {"limit": 1001}, {"skip": -1}):
+            assert client.get(path, params=params).status_code == 422
+    assert len(client.get("/api/tasks/", params={"limit": 1}).json()) == 1
+
+
+def test_read_tasks_invalid_cursor(client, db):
+    response = client.get("/api/tasks/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+    db.add_all([Task(title="Task 1"), Task(title="Task 2")])
+    db.commit()
+    next_cursor = client.get("/api/tasks/?limit=1").headers["X-Next-Cursor"]
+    response = client.get(f"/api/tasks/?limit=1&sort=due_date&cursor={next_cursor}")
+    assert response.status_code == 400
+
+
+def test_read_categories_cursor_pagination(client, db):
+    db.add_all([Category(name=f"Category {i}") for i in range(5)])
+    db.commit()
+
+    items, pages = _collect_pages(client, "/api/categories/?limit=2")
+    assert [c["name"] for c in items] == [f"Category {i}" for i in range(5)]
+    assert pages == 3
+
+
+def _explain(db, query):
+    statement = query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    if engine.dialect.name == "postgresql":
+        # Tiny test tables are cheaper to scan; make the planner show its index choice
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = db.execute(text(f"EXPLAIN {statement}")).all()
+    else:
+        rows = db.execute(text(f"EXPLAIN QUERY PLAN {statement}")).all()
+    return "\n".join(str(value) for row in rows for value in row)
+
+
+@pytest.mark.parametrize("filters, index_name", [
+    ({"status": "pending"}, "ix_tasks_status_priority"),
+    ({"status": "pending", "priority": "high"}, "ix_tasks_status_priority"),
+    ({"priority": "high"}, "ix_tasks_priority_category_id"),
+    ({"category_id": 1}, "ix_tasks_category_id_status_priority"),
+    ({"category_id": 1, "status": "pending"}, "ix_tasks_category_id_status_priority"),
+])
+def test_task_filters_use_composite_indexes(db, filters, index_name):
+    plan = _explain(db, filter_tasks(db.query(Task), **filters))
+    assert index_name in plan
+
+
+def test_migrations_upgrade_existing_database(tmp_path):
+    legacy_engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    # A database created by create_all before the composite indexes existed
+    Base.metadata.create_all(bind=legacy_engine)
+    with legacy_engine.begin() as conn:
+        for index in inspect(conn).get_indexes("tasks"):
+            if index["name"] not in ("ix_tasks_id", "ix_tasks_title"):
+                conn.execute(text(f"DROP INDEX {index['name']}"))
+
+    migrations.upgrade(legacy_engine)
+    migrations.upgrade(legacy_engine)  # idempotent
+
+    index_names = {index["name"] for index in inspect(legacy_engine).get_indexes("tasks")}
+    assert {"ix_tasks_status_priority", "ix_tasks_due_date_id"} <= index_names
+    with legacy_engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.head()
+
+
+def test_migrations_create_fresh_database(tmp_path):
+    fresh_engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    migrations.upgrade(fresh_engine)
+
+    assert inspect(fresh_engine).has_table("tasks")
+    with fresh_engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.head()
+
+
+def test_search_tasks(client, db):
+    category = Category(name="Home")
+    db.add(category)
+    db.commit()
+    db.add_all([
+        Task(title="Buy milk", description="Semi-skimmed milk and bread", category_id=category.id),
+        Task(title="Milk the cows", priority=TaskPriority.HIGH),
+        Task(title="Write report", description="Quarterly numbers"),
+    ])
+    db.commit()
+
+    response = client.get("/api/tasks/", params={"q": "milk"})
+    assert response.status_code == 200
+    titles = [task["title"] for task in response.json()]
+    assert sorted(titles) == ["Buy milk", "Milk the cows"]
+
+    # Every term must match, and the regular filters still apply
+    assert [t["title"] for t in client.get("/api/tasks/", params={"q": "milk bread"}).json()] == ["Buy milk"]
+    assert [t["title"] for t in client.get("/api/tasks/", params={"q": "milk", "priority": "high"}).json()] == ["Milk the cows"]
+    assert [t["title"] for t in client.get("/api/tasks/", params={"q": "milk", "limit": 1, "skip": 1}).json()] == [titles[1]]
+    assert client.get("/api/tasks/", params={"q": "nothing-matches"}).json() == []
+    assert client.get("/api/tasks/", params={"q": "milk", "cursor": "abc"}).status_code == 400
+
+    # Edits are searchable straight away
+    report = db.query(Task).filter(Task.title == "Write report").one()
+    client.put(f"/api/tasks/{report.id}", json={"description": "Remember the milk"})
+    assert len(client.get("/api/tasks/", params={"q": "milk"}).json()) == 3
+
+
+def test_search_uses_full_text_index(db):
+    if engine.dialect.name != "postgresql":
+        pytest.skip("PostgreSQL full-text search")
+    from backend import search
+
+    tsquery = search.ts_query("milk")
+    plan = _explain(db, db.query(Task).filter(search.matches(tsquery)))
+    assert "ix_tasks_search" in plan
+
+
+def test_bulk_create_tasks(client, db):
+    category = Category(name="Import")
+    db.add(category)
+    db.commit()
+
+    payload = [
+        {"title": f"Imported {i}", "priority": "high", "category_id": category.id}
+        for i in range(50)
+    ]
+    response = client.post("/api/tasks/bulk", json=payload)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 50
+    assert all(r["status"] == 201 for r in results)
+    assert [r["task"]["title"] for r in results] == [p["title"] for p in payload]
+    assert db.query(Task).filter(Task.category_id == category.id).count() == 50
+
+    response = client.post("/api/tasks/bulk", json=[{"title": ""}])
+    assert response.status_code == 422
+
+
+def test_bulk_create_reports_constraint_violations_per_item(client, db, foreign_keys):
+    category = Category(name="Import")
+    db.add(category)
+    db.commit()
+
+    payload = [
+        {"title": "Good", "category_id": category.id, "tags": ["a"]},
+        {"title": "Bad", "category_id": 999},
+        {"title": "Also good"},
+    ]
+    response = client.post("/api/tasks/bulk", json=payload)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["index"], r["status"]) for r in results] == [(0, 201), (1, 422), (2, 201)]
+    assert "FOREIGN KEY" in results[1]["detail"] and results[1]["task"] is None
+    assert sorted(title for (title,) in db.query(Task.title)) == ["Also good", "Good"]
+    assert client.get(f"/api/tasks/{results[0]['id']}").json()["tags"] == ["a"]
+
+
+def test_bulk_update_tasks(client, db):
+    tasks = [Task(title=f"Task {i}") for i in range(3)]
+    db.add_all(tasks)
+    db.commit()
+
+    response = client.patch("/api/tasks/bulk", json=[
+        {"id": tasks[0].id, "status": "completed"},
+        {"id": tasks[1].id, "title": "Renamed", "priority": "low"},
+        {"id": 999999, "status": "completed"},
+    ])
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [200, 200, 404]
+    assert results[0]["task"]["status"] == "completed"
+    assert results[0]["task"]["title"] == "Task 0"
+    assert results[0]["task"]["updated_at"] is not None
+    assert results[1]["task"]["title"] == "Renamed"
+    assert results[1]["task"]["priority"] == "low"
+
+    response = client.get(f"/api/tasks/{tasks[2].id}")
+    assert response.json()["status"] == "pending"
+
+
+def test_bulk_delete_tasks(client, db):
+    tasks = [Task(title=f"Task {i}") for i in range(3)]
+    db.add_all(tasks)
+    db.commit()
+    ids = [tasks[0].id, tasks[2].id, 999999]
+
+    response = client.request("DELETE", "/api/tasks/bulk", json=ids)
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()["results"]] == [204, 204, 404]
+
+    remaining = client.get("/api/tasks/").json()
+    assert [t["title"] for t in remaining] == ["Task 1"]
+
+
+def test_async_session_mode(client):
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    # NullPool: connections must not outlive the event loop that opened them
+    async_engine = create_async_engine(async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+    AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_async_db
+    try:
+        category = client.post("/api/categories/", json={"name": "Async"}).json()
+        created = client.post("/api/tasks/", json={"title": "Async task", "category_id": category["id"]})
+        assert created.status_code == 200
+
+        response = client.get("/api/tasks/")
+        assert response.status_code == 200
+        assert [t["category"]["name"] for t in response.json()] == ["Async"]
+
+        updated = client.put(f"/api/tasks/{created.json()['id']}", json={"status": "completed"})
+        assert updated.json()["status"] == "completed"
+        assert client.delete(f"/api/tasks/{created.json()['id']}").status_code == 204
+        assert client.get(f"/api/tasks/{created.json()['id']}").status_code == 404
+    finally:
+        app.dependency_overrides[get_db] = override_get_db
+
+
+def test_pool_status_endpoint(client):
+    response = client.get("/api/monitoring/pool")
+    assert response.status_code == 200
+    status = response.json()["sync"]
+    assert status["pool"] == "InstrumentedQueuePool"
+    assert {"size", "checked_out", "overflow", "checkouts", "wait_seconds_max", "timeouts"} <= status.keys()
+
+
+def test_pool_records_checkout_timeouts(tmp_path):
+    from sqlalchemy import exc
+    from backend.pool import InstrumentedQueuePool, pool_status
+
+    small_engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    with small_engine.connect():
+        assert pool_status(small_engine)["checked_out"] == 1
+        with pytest.raises(exc.TimeoutError):
+            small_engine.connect()
+
+    status = pool_status(small_engine)
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 2
+    assert status["timeouts"] == 1
+    assert status["wait_seconds_max"] >= 0.05
+
+
+def test_ttl_cache_expiry_eviction_and_stats():
+    from backend.cache import TTLCache
+
+    now = [0.0]
+    cache = TTLCache("test_ttl", maxsize=2, ttl=10, timer=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=1)
+    assert cache.get("a") == 1
+    now[0] = 5
+    assert cache.get("b") is None  # per-entry ttl elapsed
+    cache.set("c", 3)
+    cache.set("d", 4)  # evicts the least recently used entry
+    assert cache.get("a") is None
+    assert cache.get("d") == 4
+    now[0] = 20
+    assert cache.get("c") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 3, 1)
+    assert stats["hit_rate"] == 0.4
+
+
+def test_cache_stats_endpoint(client):
+    from backend.cache import TTLCache
+
+    TTLCache("test_endpoint", maxsize=10, ttl=60).set("key", "value")
+    response = client.get("/api/monitoring/caches")
+    assert response.status_code == 200
+    assert response.json()["test_endpoint"]["size"] == 1
+
+
+def test_task_reads_are_cached_with_etags(client, db, query_counter):
+    category = Category(name="Work")
+    db.add(category)
+    db.commit()
+    db.add(Task(title="Task 1", category_id=category.id))
+    db.commit()
+
+    first = client.get("/api/tasks/")
+    etag = first.headers["ETag"]
+    assert first.json()[0]["category"]["name"] == "Work"
+
+    # Served from the cache: no query, same body
+    query_counter.clear()
+    cached = client.get("/api/tasks/")
+    assert cached.content == first.content
+    assert cached.headers["ETag"] == etag
+    assert query_counter == []
+
+    not_modified = client.get("/api/tasks/", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert query_counter == []
+
+    # Writes through the API invalidate, including category writes
+    client.put(f"/api/categories/{category.id}", json={"name": "Home", "color": "#000000"})
+    changed = client.get("/api/tasks/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()[0]["category"]["name"] == "Home"
+
+    task_id = changed.json()[0]["id"]
+    single = client.get(f"/api/tasks/{task_id}")
+    assert client.get(f"/api/tasks/{task_id}", headers={"If-None-Match": single.headers["ETag"]}).status_code == 304
+    client.delete(f"/api/tasks/{task_id}")
+    assert client.get(f"/api/tasks/{task_id}", headers={"If-None-Match": single.headers["ETag"]}).status_code == 404
+
+
+def test_category_reads_are_cached_with_etags(client, db):
+    db.add_all([Category(name=f"Category {i}") for i in range(3)])
+    db.commit()
+
+    first = client.get("/api/categories/?limit=2")
+    assert len(first.json()) == 2
+    assert "X-Next-Cursor" in first.headers
+    cached = client.get("/api/categories/?limit=2", headers={"If-None-Match": f'W/{first.headers["ETag"]}'})
+    assert cached.status_code == 304
+
+    client.post("/api/categories/", json={"name": "New", "color": "#FFFFFF"})
+    response = client.get("/api/categories/", headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert len(response.json()) == 4
+
+
+def test_redis_cache_backend_shares_entries_and_generations(client, db, monkeypatch):
+    from fnmatch import fnmatch
+    from backend.response_cache import RedisCacheBackend
+
+    class FakeRedis:
+        """The redis.asyncio calls the backend makes, over a dict shared by 'workers'."""
+
+        def __init__(self):
+            self.data = {}
+
+        async def get(self, key):
+            return self.data.get(key)
+
+        async def set(self, key, value, ex=None):
+            self.data[key] = value
+
+        async def mget(self, keys):
+            return [self.data.get(key) for key in keys]
+
+        async def incr(self, key):
+            self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+
+        async def scan_iter(self, pattern):
+            for key in [key for key in self.data if fnmatch(key, pattern)]:
+                yield key
+
+        async def delete(self, key):
+            self.data.pop(key, None)
+
+    redis = FakeRedis()
+    monkeypatch.setattr(response_cache, "_backend", RedisCacheBackend("redis://fake", ttl=30, client=redis))
+    db.add(Task(title="Cached"))
+    db.commit()
+
+    first = client.get("/api/tasks/")
+    assert [key for key in redis.data if ":entry:" in key]
+    assert client.get("/api/tasks/", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    # A write through any worker bumps the shared generation
+    client.post("/api/tasks/", json={"title": "Written"})
+    other_worker = RedisCacheBackend("redis://fake", ttl=30, client=redis)
+    assert asyncio.run(other_worker.generations(["tasks", "categories"])) == [1, 0]
+    assert [task["title"] for task in client.get("/api/tasks/").json()] == ["Cached", "Written"]
+
+    asyncio.run(other_worker.clear())
+    assert not [key for key in redis.data if ":entry:" in key]
+    assert asyncio.run(other_worker.generations(["tasks"])) == [1]
+
+
+def test_event_subscription_filters_and_backpressure(monkeypatch):
+    import asyncio
+    from backend import events
+
+    monkeypatch.setattr(events.settings, "EVENTS_QUEUE_SIZE", 3)
+
+    def task(i, task_status="pending", category_id=1):
+        return {"type": "task.created", "id": i, "status": task_status, "category_id": category_id}
+
+    async def scenario():
+        broker = events.MemoryBroker()
+        pending = await broker.subscribe(status="pending", category_id=1)
+        everything = await broker.subscribe()
+
+        moved = {**task(1, "completed"), "previous": {"status": "pending", "category_id": 1}}
+        category = {"type": "category.updated", "category_id": 2}
+        await broker.publish_many([task(0, "completed"), task(0, category_id=2), moved, category])
+        await asyncio.sleep(0)
+        assert await pending.get() is moved
+        assert pending._queue.empty()
+
+        # everything got 4 events with room for 3: the backlog collapsed into a resync
+        await broker.publish_many([task(2)])
+        await asyncio.sleep(0)
+        assert await everything.get() == events.RESYNC
+        assert (await everything.get())["id"] == 2
+        assert everything.dropped == 3
+        assert broker.stats()["subscribers"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_event_stream_receives_task_changes(client):
+    import asyncio
+    import json
+    from backend import events
+
+    async def scenario():
+        chunks = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                await chunks.put(message.get("body", b""))
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/api/events/", "raw_path": b"/api/events/", "root_path": "",
+            "query_string": b"status=pending", "headers": [(b"host", b"testserver")],
+            "client": ("127.0.0.1", 0), "server": ("testserver", 80),
+        }
+        stream = asyncio.create_task(app(scope, receive, send))
+        assert await asyncio.wait_for(chunks.get(), 5) == b": connected\n\n"
+
+        # Writes go through the test client on its own thread and event loop
+        created = await asyncio.to_thread(client.post, "/api/tasks/", json={"title": "Pending"})
+        await asyncio.to_thread(client.post, "/api/tasks/", json={"title": "Done", "status": "completed"})
+        await asyncio.to_thread(client.put, f"/api/tasks/{created.json()['id']}", json={"status": "completed"})
+
+        received = []
+        for _ in range(2):
+            chunk = (await asyncio.wait_for(chunks.get(), 5)).decode()
+            assert chunk.startswith("event: task.")
+            received.append(json.loads(chunk.split("data: ", 1)[1]))
+        assert [event["type"] for event in received] == ["task.created", "task.updated"]
+        assert received[1]["previous"]["status"] == "pending"
+        assert received[1]["task"]["status"] == "completed"
+        assert chunks.empty()
+
+        disconnected.set()
+        await asyncio.wait_for(stream, 5)
+        assert events.get_broker().stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_metrics_record_routes_and_queries(client, db, monkeypatch, caplog):
+    from backend import metrics
+
+    db.add(Task(title="Measured"))
+    db.commit()
+    route = {"method": "GET", "route": "/api/tasks/{task_id}"}
+    requests_before = metrics.REQUEST_QUERIES.count(**route)
+    queries_before = metrics.REQUEST_QUERIES.sum(**route)
+
+    monkeypatch.setattr(metrics.settings, "SLOW_QUERY_MS", 0)
+    with caplog.at_level("WARNING", logger="backend.slow_queries"):
+        task_id = db.query(Task.id).scalar()
+        assert client.get(f"/api/tasks/{task_id}").status_code == 200
+    assert any("Slow query" in record.getMessage() for record in caplog.records)
+
+    # One request, labelled by its route template, that ran one query
+    assert metrics.REQUEST_QUERIES.count(**route) == requests_before + 1
+    assert metrics.REQUEST_QUERIES.sum(**route) == queries_before + 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/tasks/{task_id}",status="200"}' in body
+    assert 'http_response_size_bytes_bucket{method="GET",route="/api/tasks/{task_id}",le="+Inf"}' in body
+    assert "db_slow_queries_total" in body
+
+
+def test_password_hashing_runs_off_loop_and_rehashes_on_cost_change():
+    import asyncio
+    import threading
+    from backend import security
+
+    old_context = security.make_password_context(4)
+    new_context = security.make_password_context(5)
+
+    async def scenario():
+        hashed = await security.hash_password_async("s3cret", context=old_context)
+        threads = set()
+        original_hash = new_context.verify_and_update
+
+        def recording_verify(*args):
+            threads.add(threading.current_thread().name)
+            return original_hash(*args)
+
+        new_context.verify_and_update = recording_verify
+        wrong = await security.verify_and_update_async("wrong", hashed, context=new_context)
+        valid, upgraded = await security.verify_and_update_async("s3cret", hashed, context=new_context)
+        new_context.verify_and_update = original_hash
+        return hashed, wrong, valid, upgraded, threads
+
+    hashed, wrong, valid, upgraded, threads = asyncio.run(scenario())
+    assert hashed.startswith("$2b$04$")
+    assert wrong == (False, None)
+    assert valid and upgraded.startswith("$2b$05$")
+    assert security.verify_password("s3cret", upgraded, context=new_context)
+    assert new_context.verify_and_update("s3cret", upgraded) == (True, None)
+    assert all(name.startswith("password-hash") for name in threads)
+
+
+def test_password_hashing_reads_settings_on_first_use(monkeypatch):
+    from backend import security
+
+    security.get_password_context.cache_clear()
+    security.get_hash_executor.cache_clear()
+    monkeypatch.setattr(security.settings, "BCRYPT_ROUNDS", 4)
+    monkeypatch.setattr(security.settings, "PASSWORD_HASH_WORKERS", 2)
+    try:
+        assert security.get_password_hash("s3cret").startswith("$2b$04$")
+        assert security.get_hash_executor()._max_workers == 2
+    finally:
+        security.get_hash_executor().shutdown()
+        security.get_password_context.cache_clear()
+        security.get_hash_executor.cache_clear()
+
+
+def test_task_stats(client, db, query_counter):
+    from datetime import timedelta
+
+    work, home = Category(name="Work"), Category(name="Home")
+    db.add_all([work, home])
+    db.commit()
+    now = datetime.now(timezone.utc)
+    db.add_all([
+        Task(title="Overdue", category_id=work.id, priority=TaskPriority.HIGH, due_date=now - timedelta(days=1)),
+        Task(title="Done late", category_id=work.id, status=TaskStatus.COMPLETED, due_date=now - timedelta(days=1)),
+        Task(title="Due soon", category_id=home.id, status=TaskStatus.IN_PROGRESS, due_date=now + timedelta(hours=2)),
+        Task(title="Due later", category_id=home.id, due_date=now + timedelta(days=7)),
+        Task(title="Undated"),
+    ])
+    db.commit()
+
+    query_counter.clear()
+    response = client.get("/api/tasks/stats")
+    assert response.status_code == 200
+    assert len(query_counter) == 1
+    stats = response.json()
+    assert stats["total"] == 5
+    assert stats["overdue"] == 1
+    assert stats["due_soon"] == 1
+    assert stats["by_status"] == {"pending": 3, "in_progress": 1, "completed": 1}
+    assert stats["by_priority"] == {"low": 0, "medium": 4, "high": 1}
+    assert stats["by_category"] == [
+        {"category_id": work.id, "count": 2},
+        {"category_id": home.id, "count": 2},
+        {"category_id": None, "count": 1},
+    ]
+
+    stats = client.get(f"/api/tasks/stats?category_id={home.id}&due_soon_hours=200").json()
+    assert stats["total"] == 2
+    assert stats["due_soon"] == 2
+    assert stats["by_category"] == [{"category_id": home.id, "count": 2}]
+
+
+def test_export_tasks_ndjson(client, db):
+    import json
+
+    category = Category(name="Work", color="#FF0000")
+    db.add(category)
+    db.commit()
+    db.add_all([
+        Task(title="First", category_id=category.id, status=TaskStatus.COMPLETED),
+        Task(title="Second", description="No category"),
+        Task(title="Third", category_id=category.id),
+    ])
+    db.commit()
+
+    response = client.get("/api/tasks/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["title"] for r in records] == ["First", "Second", "Third"]
+    assert records[0]["status"] == "completed"
+    assert records[0]["category"] == {"id": category.id, "name": "Work", "color": "#FF0000"}
+    assert records[1]["category"] is None
+
+    response = client.get(f"/api/tasks/export?category_id={category.id}&status=pending")
+    assert [json.loads(line)["title"] for line in response.text.splitlines()] == ["Third"]
+
+
+def test_export_tasks_csv(client, db, monkeypatch):
+    import csv
+    import io
+    from backend import export
+
+    # Several fetch batches, so rows keep flowing across partitions
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    db.add_all([Task(title=f"Task {i}", description="Line one\nline two, with comma") for i in range(5)])
+    db.commit()
+
+    with client.stream("GET", "/api/tasks/export?format=csv") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        body = "".join(response.iter_text())
+
+    rows = list(csv.DictReader(io.StringIO(body)))
+    assert [row["title"] for row in rows] == [f"Task {i}" for i in range(5)]
+    assert rows[0]["description"] == "Line one\nline two, with comma"
+    assert rows[0]["category_name"] == ""
+
+
+def test_import_tasks_ndjson_reports_row_errors(client, db):
+    import json
+
+    category = Category(name="Imported")
+    db.add(category)
+    db.commit()
+    lines = [
+        json.dumps({"title": "One", "priority": "high", "category_id": category.id}),
+        "",
+        "{not json",
+        json.dumps({"title": "", "status": "pending"}),
+        json.dumps({"title": "Two", "status": "bogus"}),
+        json.dumps({"title": "Three", "due_date": "2030-01-01T12:00:00+00:00", "tags": ["a"]}),
+    ]
+    response = client.post("/api/tasks/import?format=ndjson", content="\n".join(lines).encode())
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["processed"], result["inserted"], result["failed"]) == (5, 2, 3)
+    assert [error["row"] for error in result["errors"]] == [2, 3, 4]
+    assert result["errors"][2]["errors"][0]["loc"] == ["status"]
+
+    titles = {task.title: task for task in db.query(Task)}
+    assert set(titles) == {"One", "Three"}
+    assert titles["One"].category_id == category.id
+
+
+def test_import_tasks_csv_in_chunks(client, db, monkeypatch):
+    from backend import importer
+
+    monkeypatch.setattr(importer, "IMPORT_BATCH_SIZE", 2)
+    body = (
+        "﻿title,description,priority,category_id\r\n"
+        'Task 1,"Multi\nline, quoted ""text""",low,\r\n'
+        "Task 2,,high,\r\n"
+        "Task 3,,urgent,\r\n"
+        "Task 4,,medium\r\n"
+        "Task 5,,medium,\r\n"
+    ).encode()
+
+    def chunks():
+        # Split mid-record and mid-character to exercise the incremental parser
+        for i in range(0, len(body), 7):
+            yield body[i:i + 7]
+
+    response = client.post("/api/tasks/import?format=csv", content=chunks())
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["processed"], result["inserted"], result["failed"]) == (5, 3, 2)
+    assert [error["row"] for error in result["errors"]] == [3, 4]
+
+    tasks = db.query(Task).order_by(Task.id).all()
+    assert [task.title for task in tasks] == ["Task 1", "Task 2", "Task 5"]
+    assert tasks[0].description == 'Multi\nline, quoted "text"'
+    assert tasks[1].description is None
+    assert tasks[1].priority == TaskPriority.HIGH
+
+
+def test_import_tasks_keeps_tags_and_reminders_and_bounds_csv_records(client, db, monkeypatch):
+    import json
+    from backend import importer
+    from backend.models import Reminder
+
+    lines = [
+        json.dumps({"title": "Tagged", "tags": ["home", "urgent"]}),
+        json.dumps({"title": "Reminded", "reminder": "2030-01-01T09:00:00+00:00"}),
+        json.dumps({"title": "Plain"}),
+    ]
+    assert client.post("/api/tasks/import?format=ndjson", content="\n".join(lines).encode()).json()["inserted"] == 3
+    tasks = {task["title"]: task for task in client.get("/api/tasks/").json()}
+    assert (tasks["Tagged"]["tags"], tasks["Plain"]["tags"]) == (["home", "urgent"], [])
+    assert [reminder.task_id for reminder in db.query(Reminder)] == [tasks["Reminded"]["id"]]
+
+    # An oversized record is reported and skipped up to its closing quote
+    monkeypatch.setattr(importer, "MAX_RECORD_SIZE", 50)
+    body = "title,description\n" + 'Long,"' + "x\n" * 40 + 'end"\n' + "After,fine\n" + 'Open,"never closed\n'
+    result = client.post("/api/tasks/import?format=csv", content=body.encode()).json()
+    assert (result["processed"], result["inserted"], result["failed"]) == (3, 1, 2)
+    assert "Record longer than 50" in result["errors"][0]["errors"][0]["msg"]
+    assert result["errors"][1]["errors"][0]["msg"] == "Unterminated quoted field"
+    assert db.query(Task).filter(Task.title == "After").count() == 1
+
+    # Over-long lines are dropped as they stream in, in NDJSON too
+    body = json.dumps({"title": "Long", "description": "x" * 200}) + "\n" + json.dumps({"title": "Short"})
+    result = client.post("/api/tasks/import?format=ndjson", content=body.encode()).json()
+    assert (result["processed"], result["inserted"], result["failed"]) == (2, 1, 1)
+    assert result["errors"][0] == {"row": 1, "errors": [{"loc": [], "msg": "Record longer than 50 characters"}]}
+    body = "title,description\n" + "Wide," + "y" * 200 + "\nNarrow,ok\n"
+    chunks = [body[i:i + 16].encode() for i in range(0, len(body), 16)]
+    result = client.post("/api/tasks/import?format=csv", content=iter(chunks)).json()
+    assert (result["processed"], result["inserted"], result["failed"]) == (2, 1, 1)
+    assert db.query(Task).filter(Task.title == "Narrow").count() == 1
+
+    monkeypatch.setattr(importer, "MAX_RECORD_SIZE", 1 << 30)
+    body = "title,description\n" + "Huge," + "x" * 200_000 + "\nNext,ok\n"
+    result = client.post("/api/tasks/import?format=csv", content=body.encode()).json()
+    assert (result["inserted"], result["failed"]) == (1, 1)
+    assert result["errors"][0]["errors"][0]["msg"].startswith("Invalid CSV")
+
+
+def test_import_reports_foreign_key_violations_as_row_errors(client, db, foreign_keys):
+    import json
+
+    category = Category(name="Imported")
+    db.add(category)
+    db.commit()
+    lines = [
+        json.dumps({"title": "Good", "category_id": category.id}),
+        json.dumps({"title": "Bad", "category_id": 999}),
+        json.dumps({"title": "Tagged bad", "category_id": 998, "tags": ["x"]}),
+        json.dumps({"title": "Also good"}),
+    ]
+    response = client.post("/api/tasks/import?format=ndjson", content="\n".join(lines).encode())
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["inserted"], result["failed"]) == (2, 2)
+    assert [error["row"] for error in result["errors"]] == [2, 3]
+    assert "FOREIGN KEY" in result["errors"][0]["errors"][0]["msg"]
+    assert sorted(title for (title,) in db.query(Task.title)) == ["Also good", "Good"]
+
+
+def test_imported_tasks_are_stamped_and_synced(client, db, monkeypatch):
+    import json
+
+    from backend import importer
+    from backend.routes import sync
+
+    monkeypatch.setattr(sync.settings, "SYNC_LAG_SECONDS", 0)
+    watermark = client.get("/api/sync/").json()["watermark"]
+    body = "\n".join(json.dumps({"title": f"Imported {i}"}) for i in range(3)).encode()
+    assert client.post("/api/tasks/import?format=ndjson", content=body).json()["inserted"] == 3
+
+    assert all(task.updated_at is not None for task in db.query(Task))
+    changes = client.get("/api/sync/", params={"watermark": watermark}).json()
+    assert [task["title"] for task in changes["tasks"]] == [f"Imported {i}" for i in range(3)]
+
+    # COPY on PostgreSQL bypasses the column's Python-side default
+    now = datetime.now(timezone.utc)
+    values = dict(zip(importer.COPY_COLUMNS, importer._copy_values({"title": "Copied", "status": TaskStatus.PENDING}, now)))
+    assert (values["title"], values["status"], values["updated_at"]) == ("Copied", "PENDING", now)
+
+
+def test_delta_sync_returns_changes_and_deletions_since_watermark(client, db, monkeypatch):
+    from backend.routes import sync
+
+    monkeypatch.setattr(sync.settings, "SYNC_LAG_SECONDS", 0)
+    category = client.post("/api/categories/", json={"name": "Home"}).json()
+    ids = [client.post("/api/tasks/", json={"title": f"Task {i}"}).json()["id"] for i in range(5)]
+
+    first = client.get("/api/sync/").json()
+    assert [task["id"] for task in first["tasks"]] == ids
+    assert [c["id"] for c in first["categories"]] == [category["id"]]
+    assert first["deleted"] == {"tasks": [], "categories": []}
+    assert first["has_more"] is False
+
+    # Nothing changed since the watermark
+    empty = client.get("/api/sync/", params={"watermark": first["watermark"]}).json()
+    assert (empty["tasks"], empty["categories"], empty["has_more"]) == ([], [], False)
+
+    client.put(f"/api/tasks/{ids[1]}", json={"title": "Renamed"})
+    client.delete(f"/api/tasks/{ids[2]}")
+    client.delete(f"/api/categories/{category['id']}")
+    changes = client.get("/api/sync/", params={"watermark": empty["watermark"]}).json()
+    assert [(task["id"], task["title"]) for task in changes["tasks"]] == [(ids[1], "Renamed")]
+    assert changes["categories"] == []
+    assert changes["deleted"] == {"tasks": [ids[2]], "categories": [category["id"]]}
+
+    # Paging with a small limit visits every change exactly once
+    seen, watermark = [], None
+    while True:
+        page = client.get("/api/sync/", params={"limit": 2, **({"watermark": watermark} if watermark else {})}).json()
+        assert len(page["tasks"]) <= 2
+        seen += [task["id"] for task in page["tasks"]]
+        watermark = page["watermark"]
+        if not page["has_more"]:
+            break
+    assert sorted(seen) == sorted(set(ids) - {ids[2]})
+
+    assert client.get("/api/sync/", params={"watermark": "garbage"}).status_code == 400
+
+
+def test_reminders_fire_once_across_schedulers(client, db):
+    import asyncio
+    from backend.models import Reminder
+    from backend.reminders import ReminderScheduler
+
+    past, future = "2020-01-01T12:00:00+02:00", "2999-01-01T00:00:00Z"
+    task = client.post("/api/tasks/", json={"title": "Call", "reminder": past}).json()
+    assert task["reminder"].startswith("2020-01-01T10:00:00")
+    later = client.post("/api/tasks/", json={"title": "Later", "reminder": future}).json()
+    client.post("/api/tasks/", json={"title": "No reminder"})
+    assert client.patch("/api/tasks/bulk", json=[{"id": later["id"], "reminder": past}]).status_code == 200
+    assert db.query(Reminder.task_id).order_by(Reminder.task_id).all() == [(task["id"],), (later["id"],)]
+
+    # Clearing a reminder removes it from the queue
+    client.put(f"/api/tasks/{later['id']}", json={"reminder": None})
+    assert db.query(Reminder.task_id).all() == [(task["id"],)]
+    client.put(f"/api/tasks/{later['id']}", json={"reminder": past})
+
+    fired = []
+
+    def scheduler(worker):
+        async def dispatch(tasks):
+            fired.extend((worker, row.id) for row in tasks)
+        return ReminderScheduler(dispatch=dispatch, session_factory=TestingSessionLocal, worker=worker)
+
+    a, b = scheduler("a"), scheduler("b")
+
+    async def scenario():
+        assert await a.claim() is False
+        await b.claim()
+        assert (a.claimed, b.claimed) == (2, 0)
+        # a's lease runs out before it fires: b takes the reminders over
+        db.query(Reminder).update({"claimed_until": datetime(2000, 1, 1, tzinfo=timezone.utc)})
+        db.commit()
+        await b.claim()
+        assert await a.fire_due() == 0
+        assert await b.fire_due() == 2
+
+    asyncio.run(scenario())
+    assert sorted(fired) == [("b", task["id"]), ("b", later["id"])]
+    assert db.query(Reminder).count() == 0
+
+
+def test_task_tags_filters_and_counts(client, db, query_counter):
+    from backend.models import TaskTag
+
+    home = client.post("/api/tasks/", json={"title": "Home", "tags": ["home", " urgent "]}).json()
+    work = client.post("/api/tasks/", json={"title": "Work", "tags": ["work", "urgent"], "status": "completed"}).json()
+    client.post("/api/tasks/bulk", json=[{"title": "Chore", "tags": ["home"]}, {"title": "Untagged"}])
+
+    def titles(**params):
+        return sorted(task["title"] for task in client.get("/api/tasks/", params=params).json())
+
+    assert titles(tags=["home", "urgent"]) == ["Home"]
+    assert titles(tags=["urgent"]) == ["Home", "Work"]
+    assert titles(any_tags=["work", "home"]) == ["Chore", "Home", "Work"]
+    assert titles(any_tags=["urgent"], status="completed") == ["Work"]
+    assert titles(tags=["missing"]) == []
+
+    query_counter.clear()
+    task = client.get(f"/api/tasks/{home['id']}").json()
+    assert task["tags"] == ["home", "urgent"]
+    assert len(query_counter) == 1
+
+    counts = client.get("/api/tasks/tags").json()
+    assert counts == [{"name": "home", "count": 2}, {"name": "urgent", "count": 2}, {"name": "work", "count": 1}]
+    assert client.get("/api/tasks/tags", params={"status": "completed"}).json()[0] == {"name": "urgent", "count": 1}
+
+    # Replacing the tags is a change of the task
+    updated = client.put(f"/api/tasks/{home['id']}", json={"tags": ["garden"], "version": home["version"]}).json()
+    assert updated["version"] == home["version"] + 1
+    assert client.get(f"/api/tasks/{home['id']}").json()["tags"] == ["garden"]
+    client.patch("/api/tasks/bulk", json=[{"id": work["id"], "tags": None}])
+    assert client.get(f"/api/tasks/{work['id']}").json()["tags"] == []
+
+    client.delete(f"/api/tasks/{home['id']}")
+    assert db.query(TaskTag).filter(TaskTag.task_id == home["id"]).count() == 0
+    assert [tag["name"] for tag in client.get("/api/tasks/tags").json()] == ["home"]
+
+
+def test_task_tags_in_sync_export_and_stats(client, db, monkeypatch):
+    import csv
+    import io
+    import json
+    from backend.routes import sync
+
+    monkeypatch.setattr(sync.settings, "SYNC_LAG_SECONDS", 0)
+    home = client.post("/api/tasks/", json={"title": "Home", "tags": ["home", "urgent"]}).json()
+    client.post("/api/tasks/", json={"title": "Work", "tags": ["work"], "status": "completed"})
+    client.post("/api/tasks/", json={"title": "Untagged"})
+
+    first = client.get("/api/sync/").json()
+    assert [task["tags"] for task in first["tasks"]] == [["home", "urgent"], ["work"], []]
+    client.put(f"/api/tasks/{home['id']}", json={"tags": ["garden"]})
+    changes = client.get("/api/sync/", params={"watermark": first["watermark"]}).json()
+    assert [(task["id"], task["tags"]) for task in changes["tasks"]] == [(home["id"], ["garden"])]
+
+    lines = client.get("/api/tasks/export", params={"any_tags": ["garden", "work"]}).text.splitlines()
+    assert [(record["title"], record["tags"]) for record in map(json.loads, lines)] == [("Home", ["garden"]), ("Work", ["work"])]
+    client.put(f"/api/tasks/{home['id']}", json={"tags": ["garden", "home"]})
+    rows = list(csv.DictReader(io.StringIO(client.get("/api/tasks/export", params={"format": "csv"}).text)))
+    assert [row["tags"] for row in rows] == ["garden|home", "work", ""]
+
+    assert client.get("/api/tasks/stats", params={"tags": ["garden", "home"]}).json()["total"] == 1
+    assert client.get("/api/tasks/stats", params={"any_tags": ["garden", "work"]}).json()["total"] == 2
+    counts = client.get("/api/tasks/tags", params={"tags": ["garden"]}).json()
+    assert counts == [{"name": "garden", "count": 1}, {"name": "home", "count": 1}]
+
+
+def test_reads_use_replicas_with_read_your_writes_and_failover(client, db, tmp_path, monkeypatch):
+    import asyncio
+    from backend import database
+
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    replica_engine = create_engine(replica_url)
+    Base.metadata.create_all(bind=replica_engine)
+    with replica_engine.begin() as conn:
+        conn.execute(Task.__table__.insert().values(title="On the replica"))
+    replica_engine.dispose()
+    db.add(Task(title="On the primary"))
+    db.commit()
+
+    def titles():
+        return [task["title"] for task in client.get("/api/tasks/").json()]
+
+    def use_replicas(*urls):
+        monkeypatch.setattr(database.settings, "DATABASE_REPLICA_URLS", list(urls))
+        asyncio.run(database.close_database())
+
+    try:
+        use_replicas(f"sqlite:///{tmp_path / 'missing' / 'down.db'}", replica_url)
+        assert titles() == ["On the replica"]
+        assert titles() == ["On the replica"]
+        down, up = database.get_database().replicas.replicas
+        assert (down.healthy, down.failures, up.healthy) == (False, 1, True)
+
+        # The writer reads its own write from the primary
+        client.post("/api/tasks/", json={"title": "Just written"})
+        assert titles() == ["On the primary", "Just written"]
+        client.cookies.clear()
+        asyncio.run(response_cache.clear())
+        assert titles() == ["On the replica"]
+
+        # No healthy replica left: the primary serves reads
+        use_replicas(f"sqlite:///{tmp_path / 'missing' / 'down.db'}")
+        assert titles() == ["On the primary", "Just written"]
+    finally:
+        monkeypatch.setattr(database.settings, "DATABASE_REPLICA_URLS", [])
+        asyncio.run(database.close_database())
+
+
+def test_admission_control_sheds_by_priority_and_deadline(monkeypatch):
+    import asyncio
+    from backend import admission, metrics
+
+    monkeypatch.setattr(admission.settings, "ADMISSION_CONCURRENCY", 1)
+    monkeypatch.setattr(admission.settings, "ADMISSION_QUEUE_SIZE", 1)
+    monkeypatch.setattr(admission.settings, "ADMISSION_QUEUE_TIMEOUT", 0.2)
+    monkeypatch.setattr(admission.settings, "ADMISSION_ROUTE_LIMITS", {"GET /api/tasks/{task_id}": 1})
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def handler(scope, receive, send):
+            if scope["path"] != "/api/health":
+                await gate.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = admission.AdmissionMiddleware(handler, routes=app.router.routes)
+
+        async def call(method, path):
+            scope = {"type": "http", "method": method, "path": path, "root_path": "", "query_string": b"", "headers": []}
+            messages = []
+
+            async def receive():
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message):
+                messages.append(message)
+
+            await middleware(scope, receive, send)
+            return messages[0]["status"], dict(messages[0]["headers"]).get(b"retry-after")
+
+        def start(method, path):
+            return asyncio.create_task(call(method, path))
+
+        running = start("GET", "/api/tasks/")
+        await asyncio.sleep(0)
+        bulk = start("GET", "/api/tasks/export")
+        await asyncio.sleep(0)
+        # A write preempts the queued bulk read; a bulk read cannot preempt the write
+        write = start("POST", "/api/tasks/")
+        await asyncio.sleep(0)
+        assert await bulk == (503, b"1")
+        assert await call("GET", "/api/tasks/stats") == (503, b"1")
+        # Health checks are never queued
+        assert await call("GET", "/api/health") == (200, None)
+        gate.set()
+        assert await running == (200, None)
+        assert await write == (200, None)
+
+        # Over the route's own limit until the deadline: 429
+        gate.clear()
+        first = start("GET", "/api/tasks/1")
+        await asyncio.sleep(0)
+        assert await call("GET", "/api/tasks/2") == (429, b"1")
+        gate.set()
+        assert await first == (200, None)
+        assert middleware.stats()["global"] == {"active": 0, "queued": 0}
+
+    asyncio.run(scenario())
+    assert metrics.ADMISSION_SHED.value(limiter="global", priority="bulk_read", reason="preempted") >= 1
+    assert metrics.ADMISSION_SHED.value(limiter="GET /api/tasks/{task_id}", priority="read", reason="deadline") >= 1
+    assert "admission_queue_depth" in metrics.render_metrics()